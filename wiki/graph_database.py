@@ -4,17 +4,201 @@ Database operations for storing and retrieving graph data from PostgreSQL.
 """
 
 import os
+import json
 import logging
+import threading
+import weakref
 import logging_config  # Centralized logging configuration
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterator
 import psycopg2
-from psycopg2.extras import RealDictCursor, Json
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 from graph_extractor import ExtractionResult
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming results through a server-side cursor
+STREAM_ITERSIZE = 10_000
+
+# Hot-path statements prepared once per connection so the server skips parse/plan on every call
+PREPARED_STATEMENTS = {
+    # Stores a whole extraction result in one round trip. New entities are inserted with
+    # ON CONFLICT DO NOTHING, so entities that already exist are not rewritten (no new
+    # row version, no WAL, no updated_at bump); their ids are read back from the
+    # statement snapshot instead. Relations are then inserted against those ids, or
+    # against existing rows for entities the caller had cached.
+    # Endpoint names are passed explicitly because the fill trigger on relationships
+    # cannot see entities inserted by the same statement.
+    'store_graph': """
+        PREPARE store_graph(text[], text[], text[], integer, jsonb,
+                            text[], text[], text[], text[], text[], text[]) AS
+        WITH entity_input AS (
+            SELECT * FROM unnest($1, $2, $3) AS t(name, entity_type, normalized_name)
+        ),
+        inserted_entities AS (
+            INSERT INTO entities (name, entity_type, normalized_name, document_id, metadata)
+            SELECT name, entity_type, normalized_name, $4, $5
+            FROM entity_input
+            ON CONFLICT (normalized_name, entity_type) DO NOTHING
+            RETURNING id, name, normalized_name, entity_type
+        ),
+        -- The snapshot predates the insert, so this only finds entities that already existed.
+        -- A conflicting row committed by a concurrent writer after the snapshot is in neither
+        -- half; the caller resolves it with resolve_entities and stores its relations separately.
+        resolved AS (
+            SELECT id, name, normalized_name, entity_type, true AS inserted FROM inserted_entities
+            UNION ALL
+            SELECT e.id, e.name, e.normalized_name, e.entity_type, false
+            FROM entities e
+            JOIN entity_input i ON e.normalized_name = i.normalized_name AND e.entity_type = i.entity_type
+        ),
+        relation_input AS (
+            SELECT *
+            FROM unnest($6, $7, $8, $9, $10, $11) AS t(head_normalized_name, head_entity_type,
+                                                       relation_type,
+                                                       tail_normalized_name, tail_entity_type,
+                                                       source_text)
+        ),
+        endpoints AS (
+            SELECT id, name, normalized_name, entity_type FROM inserted_entities
+            UNION ALL
+            SELECT id, name, normalized_name, entity_type FROM entities
+            WHERE (normalized_name, entity_type) IN (
+                SELECT head_normalized_name, head_entity_type FROM relation_input
+                UNION
+                SELECT tail_normalized_name, tail_entity_type FROM relation_input
+            )
+        ),
+        inserted_relations AS (
+            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, source_text, metadata,
+                                       head_entity_name, head_entity_type, tail_entity_name, tail_entity_type)
+            SELECT h.id, t.id, r.relation_type, r.source_text, $5,
+                   h.name, h.entity_type, t.name, t.entity_type
+            FROM relation_input r
+            JOIN endpoints h ON h.normalized_name = r.head_normalized_name AND h.entity_type = r.head_entity_type
+            JOIN endpoints t ON t.normalized_name = r.tail_normalized_name AND t.entity_type = r.tail_entity_type
+            ON CONFLICT (head_entity_id, tail_entity_id, relation_type) DO NOTHING
+            RETURNING head_entity_id, tail_entity_id, relation_type
+        )
+        SELECT
+            (SELECT COALESCE(json_agg(json_build_array(id, normalized_name, entity_type, inserted)), '[]')
+             FROM resolved),
+            (SELECT COALESCE(json_agg(json_build_array(head_entity_id, tail_entity_id, relation_type)), '[]')
+             FROM inserted_relations)
+    """,
+    # Looks up entities committed by a concurrent writer after the store_graph snapshot;
+    # a new statement sees them under READ COMMITTED.
+    'resolve_entities': """
+        PREPARE resolve_entities(text[], text[]) AS
+        SELECT e.id, e.normalized_name, e.entity_type
+        FROM entities e
+        JOIN unnest($1, $2) AS t(normalized_name, entity_type)
+            ON e.normalized_name = t.normalized_name AND e.entity_type = t.entity_type
+    """,
+    # Inserts relations between resolved entity ids; the fill trigger copies the endpoint names.
+    'store_relations': """
+        PREPARE store_relations(integer[], integer[], text[], text[], jsonb) AS
+        INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, source_text, metadata)
+        SELECT head_entity_id, tail_entity_id, relation_type, source_text, $5
+        FROM unnest($1, $2, $3, $4) AS t(head_entity_id, tail_entity_id, relation_type, source_text)
+        ON CONFLICT (head_entity_id, tail_entity_id, relation_type) DO NOTHING
+        RETURNING head_entity_id, tail_entity_id, relation_type
+    """,
+}
+
+# Independent graph statistics queries, each returning a JSON object of statistics.
+# Grouped by the table they scan so each table is read once per query.
+STATISTICS_QUERIES = [
+    """
+    SELECT json_build_object(
+        'total_entities', COUNT(*),
+        'total_documents', COUNT(DISTINCT document_id),
+        'entity_types', COALESCE(
+            (SELECT json_object_agg(entity_type, count ORDER BY count DESC)
+             FROM (SELECT entity_type, COUNT(*) AS count FROM entities GROUP BY entity_type) c),
+            '{}'::json)
+    )
+    FROM entities
+    """,
+    """
+    SELECT json_build_object(
+        'total_relations', COALESCE(SUM(count), 0)::bigint,
+        'relation_types', COALESCE(json_object_agg(relation_type, count ORDER BY count DESC), '{}'::json)
+    )
+    FROM (SELECT relation_type, COUNT(*) AS count FROM relationships GROUP BY relation_type) c
+    """,
+    """
+    WITH connection_counts AS (
+        SELECT entity_id, COUNT(*) AS connection_count
+        FROM (
+            SELECT head_entity_id AS entity_id FROM relationships
+            UNION ALL
+            SELECT tail_entity_id FROM relationships
+        ) endpoints
+        GROUP BY entity_id
+    ),
+    most_connected AS (
+        SELECT e.name, e.entity_type,
+               COALESCE(cc.connection_count, 0) AS connection_count
+        FROM entities e
+        LEFT JOIN connection_counts cc ON cc.entity_id = e.id
+        ORDER BY connection_count DESC
+        LIMIT 10
+    )
+    SELECT json_build_object(
+        'most_connected_entities', COALESCE(json_agg(m ORDER BY m.connection_count DESC), '[]'::json)
+    )
+    FROM most_connected m
+    """,
+]
+
+
+class EntityCache:
+    """Thread-safe LRU mapping of (normalized_name, entity_type) to entity id."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[int]:
+        """Return the cached id for key, or None on a miss."""
+        with self._lock:
+            entity_id = self._entries.get(key)
+            if entity_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entity_id
+
+    def update(self, entries: Dict[Tuple[str, str], int]) -> None:
+        """Insert or refresh entries, evicting the least recently used ones."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for key, entity_id in entries.items():
+                self._entries[key] = entity_id
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
 
 class GraphDatabase:
     """Handles PostgreSQL operations for graph data storage and retrieval."""
@@ -24,7 +208,10 @@ class GraphDatabase:
                  port: int = None,
                  database: str = None,
                  user: str = None,
-                 password: str = None):
+                 password: str = None,
+                 min_connections: int = 2,
+                 max_connections: int = None,
+                 entity_cache_size: int = 100_000):
         """
         Initialize database connection parameters.
 
@@ -34,36 +221,101 @@ class GraphDatabase:
             database: Database name (defaults to env var POSTGRES_DB or 'wiki')
             user: Database user (defaults to env var POSTGRES_USER or 'postgres')
             password: Database password (defaults to env var POSTGRES_PASSWORD)
+            min_connections: Number of idle connections kept open by the pool
+            max_connections: Maximum pooled connections (defaults to env var POSTGRES_POOL_MAX or 20)
+            entity_cache_size: Number of entity ids kept in memory to skip lookups (0 disables)
         """
         self.host = host or os.getenv('POSTGRES_HOST', 'localhost')
         self.port = port or int(os.getenv('POSTGRES_PORT', '5432'))
         self.database = database or os.getenv('POSTGRES_DB', 'wiki_test')
         self.user = user or os.getenv('POSTGRES_USER', 'postgres')
         self.password = password or os.getenv('POSTGRES_PASSWORD', 'postgres')
+        self.min_connections = min_connections
+        self.max_connections = max_connections or int(os.getenv('POSTGRES_POOL_MAX', '20'))
+
+        # The pool is created lazily so constructing a GraphDatabase never touches the network
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+        # Pooled connections that already hold the PREPARED_STATEMENTS
+        self._prepared_connections = weakref.WeakSet()
+
+        # Entities are never deleted by this class, so cached ids stay valid
+        self._entity_cache = EntityCache(entity_cache_size)
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Return the connection pool, creating it on first use."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        minconn=self.min_connections,
+                        maxconn=self.max_connections,
+                        host=self.host,
+                        port=self.port,
+                        database=self.database,
+                        user=self.user,
+                        password=self.password
+                    )
+        return self._pool
 
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections."""
-        conn = None
+    def get_connection(self, readonly: bool = False):
+        """
+        Context manager for pooled database connections.
+
+        Args:
+            readonly: Run in autocommit mode, so plain reads send no BEGIN or COMMIT.
+                Not for server-side (named) cursors, which need a transaction.
+        """
         try:
-            conn = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                cursor_factory=RealDictCursor
-            )
+            pool = self._get_pool()
+            conn = pool.getconn()
+        except Exception as e:
+            logger.error(f"Database connection error: {e}")
+            raise
+
+        try:
+            # Only touch the attribute when the pooled connection is in the other mode
+            if conn.autocommit != readonly:
+                try:
+                    conn.autocommit = readonly
+                except Exception:
+                    # Dead, or stuck in a transaction; drop it instead of returning it to the pool
+                    conn.close()
+                    raise
             yield conn
+            if not readonly:
+                conn.commit()
         except Exception as e:
-            if conn:
+            if not conn.closed and not readonly:
                 conn.rollback()
             logger.error(f"Database connection error: {e}")
             raise
         finally:
-            if conn:
-                conn.commit()
-                conn.close()
+            pool.putconn(conn, close=bool(conn.closed))
+
+    def _prepare_statements(self, cur) -> None:
+        """Prepare the hot-path statements on the cursor's connection if not done yet."""
+        conn = cur.connection
+        if conn in self._prepared_connections:
+            return
+
+        for statement in PREPARED_STATEMENTS.values():
+            cur.execute(statement)
+        self._prepared_connections.add(conn)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    def __del__(self):
+        # Attributes may be missing if __init__ failed part-way
+        if getattr(self, '_pool', None) is not None:
+            self.close()
 
     def store_extraction_result(self,
                                doc_id: str,
@@ -82,82 +334,173 @@ class GraphDatabase:
         Returns:
             Dictionary with counts of stored entities and relations
         """
-        if metadata is None:
-            metadata = {}
+        return self.store_extraction_results([(doc_id, title, extraction_result, metadata)])[0]
+
+    def store_extraction_results(self,
+                                 documents: List[Tuple[str, str, ExtractionResult, Optional[Dict[str, Any]]]]
+                                 ) -> List[Dict[str, int]]:
+        """
+        Store the extraction results of several documents in one transaction.
+
+        All documents share one pooled connection and one commit, and entity ids
+        resolved for earlier documents are reused for later ones instead of being
+        upserted again.
+
+        Args:
+            documents: List of (doc_id, title, extraction_result, metadata) tuples
+
+        Returns:
+            One dictionary with counts of stored entities and relations per document
+        """
+        # Ids resolved within this batch; only cached once they are committed
+        batch_ids = {}
+        results = []
 
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                # Store entities and collect their IDs
-                entity_id_map = {}
-                entities_stored = 0
+                self._prepare_statements(cur)
+                for doc_id, _, extraction_result, metadata in documents:
+                    results.append(self._store_graph(cur, doc_id, extraction_result, metadata, batch_ids))
+                conn.commit()
 
-                for entity_text, entity_type in extraction_result.entities:
-                    # Check if entity already exists (by normalized name)
-                    normalized_name = entity_text.lower().strip()
+        self._entity_cache.update(batch_ids)
 
-                    cur.execute("""
-                        SELECT id FROM entities
-                        WHERE normalized_name = %s AND entity_type = %s
-                        LIMIT 1
-                    """, (normalized_name, entity_type))
-
-                    existing_entity = cur.fetchone()
-
-                    if existing_entity:
-                        entity_id_map[entity_text] = existing_entity['id']
-                        logger.warning(f"Entity {entity_text} already exists")
-                    else:
-                        # Insert new entity
-                        cur.execute("""
-                            INSERT INTO entities (name, entity_type, normalized_name, document_id, metadata)
-                            VALUES (%s, %s, %s, %s, %s)
-                            RETURNING id
-                        """, (entity_text, entity_type, normalized_name, doc_id, Json(metadata)))
-
-                        entity_id = cur.fetchone()['id']
-                        entity_id_map[entity_text] = entity_id
-                        entities_stored += 1
-
-                # Store relations
-                relations_stored = 0
-
-                for head_text, relation_type, tail_text in extraction_result.relations:
-                    # Skip relations where entities weren't extracted
-                    if head_text not in entity_id_map or tail_text not in entity_id_map:
-                        logger.warning(f"Skipping relation {head_text} -> {relation_type} -> {tail_text}: entities not found")
-                        continue
-
-                    head_entity_id = entity_id_map[head_text]
-                    tail_entity_id = entity_id_map[tail_text]
-
-                    # Check if relation already exists
-                    cur.execute("""
-                        SELECT id FROM relationships
-                        WHERE head_entity_id = %s AND tail_entity_id = %s AND relation_type = %s
-                        LIMIT 1
-                    """, (head_entity_id, tail_entity_id, relation_type))
-
-                    if cur.fetchone():
-                        logger.warning(f"Relation {head_text} -> {relation_type} -> {tail_text} already exists")
-                    else:
-                        # Insert new relation
-                        source_text = f"{head_text} {relation_type} {tail_text}"
-                        cur.execute("""
-                            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, source_text, metadata)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (head_entity_id, tail_entity_id, relation_type, source_text, Json(metadata)))
-                        relations_stored += 1
+        for (doc_id, _, _, _), result in zip(documents, results):
+            logger.info("Stored %d new entities and %d new relations for document %s",
+                        result['entities_stored'], result['relations_stored'], doc_id)
 
-                conn.commit()
+        return results
 
-                logger.info(f"Stored {entities_stored} new entities and {relations_stored} new relations for document {doc_id}")
+    def _store_graph(self,
+                     cur,
+                     doc_id: str,
+                     extraction_result: ExtractionResult,
+                     metadata: Optional[Dict[str, Any]],
+                     batch_ids: Dict[Tuple[str, str], int]) -> Dict[str, int]:
+        """Store one document's entities and relations, adding the ids it resolves to batch_ids."""
+        if metadata is None:
+            metadata = {}
 
-                return {
-                    'entities_stored': entities_stored,
-                    'relations_stored': relations_stored,
-                    'total_entities': len(extraction_result.entities),
-                    'total_relations': len(extraction_result.relations)
-                }
+        # Serialized once and bound as a plain string for the jsonb statement parameter
+        metadata_json = json.dumps(metadata)
+
+        # Normalize each distinct surface form once; relations mostly reuse entity texts
+        normalized_names = {text: text.lower().strip() for text, _ in extraction_result.entities}
+
+        def normalize(text: str) -> str:
+            normalized = normalized_names.get(text)
+            if normalized is None:
+                normalized = normalized_names[text] = text.lower().strip()
+            return normalized
+
+        # GLiNER emits every mention, so collapse repeated entities to one
+        # representative surface form per (normalized_name, entity_type)
+        unique_entities = {}
+        for entity_text, entity_type in extraction_result.entities:
+            unique_entities.setdefault((normalized_names[entity_text], entity_type), entity_text)
+
+        # Resolve ids from this batch and the cache first, collecting the rest for the database
+        entity_id_map = {}
+        new_entities = {}
+        for key, entity_text in unique_entities.items():
+            entity_id = batch_ids.get(key)
+            if entity_id is None:
+                entity_id = self._entity_cache.get(key)
+            if entity_id is None:
+                new_entities[key] = entity_text
+            else:
+                entity_id_map[key] = entity_id
+
+        # Resolve relation endpoints, skipping relations where entities weren't extracted
+        new_relations = {}
+        for head_text, head_type, relation_type, tail_text, tail_type in dict.fromkeys(extraction_result.relations):
+            head_key = (normalize(head_text), head_type)
+            tail_key = (normalize(tail_text), tail_type)
+            if head_key not in unique_entities or tail_key not in unique_entities:
+                logger.warning("Skipping relation %s -> %s -> %s: entities not found", head_text, relation_type, tail_text)
+                continue
+            if head_key == tail_key:
+                logger.warning("Skipping relation %s -> %s -> %s: self-relation", head_text, relation_type, tail_text)
+                continue
+            new_relations.setdefault((head_key, relation_type, tail_key), (head_text, tail_text))
+
+        # Upsert the unresolved entities and insert the relations in a single round trip,
+        # letting the unique constraints skip rows that already exist
+        inserted_entities = set()
+        inserted_relations = set()
+        if new_entities or new_relations:
+            cur.execute("EXECUTE store_graph(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)", (
+                list(new_entities.values()),
+                [entity_type for _, entity_type in new_entities],
+                [normalized_name for normalized_name, _ in new_entities],
+                doc_id,
+                metadata_json,
+                [head_key[0] for head_key, _, _ in new_relations],
+                [head_key[1] for head_key, _, _ in new_relations],
+                [relation_type for _, relation_type, _ in new_relations],
+                [tail_key[0] for _, _, tail_key in new_relations],
+                [tail_key[1] for _, _, tail_key in new_relations],
+                [f"{head_text} {relation_type} {tail_text}"
+                 for (_, relation_type, _), (head_text, tail_text) in new_relations.items()],
+            ))
+            upserted, inserted = cur.fetchone()
+            for entity_id, normalized_name, entity_type, was_inserted in upserted:
+                key = (normalized_name, entity_type)
+                entity_id_map[key] = entity_id
+                if was_inserted:
+                    inserted_entities.add(key)
+            inserted_relations = {tuple(row) for row in inserted}
+
+            # Entities a concurrent writer committed after the snapshot were neither inserted
+            # nor found, so their relations were skipped; resolve them and store those now
+            missing = [key for key in new_entities if key not in entity_id_map]
+            if missing:
+                cur.execute("EXECUTE resolve_entities(%s, %s)", (
+                    [normalized_name for normalized_name, _ in missing],
+                    [entity_type for _, entity_type in missing],
+                ))
+                for entity_id, normalized_name, entity_type in cur.fetchall():
+                    entity_id_map[(normalized_name, entity_type)] = entity_id
+
+                retried = [
+                    (entity_id_map[head_key], entity_id_map[tail_key], relation_type,
+                     f"{head_text} {relation_type} {tail_text}")
+                    for (head_key, relation_type, tail_key), (head_text, tail_text) in new_relations.items()
+                    if (head_key in missing or tail_key in missing)
+                    and head_key in entity_id_map and tail_key in entity_id_map
+                ]
+                if retried:
+                    cur.execute("EXECUTE store_relations(%s, %s, %s, %s, %s)", (
+                        *(list(column) for column in zip(*retried)),
+                        metadata_json,
+                    ))
+                    inserted_relations.update(tuple(row) for row in cur.fetchall())
+
+        for key, entity_text in unique_entities.items():
+            if key not in entity_id_map:
+                logger.warning("Entity %s could not be resolved", entity_text)
+            elif key not in inserted_entities:
+                logger.warning("Entity %s already exists", entity_text)
+
+        for (head_key, relation_type, tail_key), (head_text, tail_text) in new_relations.items():
+            if head_key not in entity_id_map or tail_key not in entity_id_map:
+                logger.warning("Skipping relation %s -> %s -> %s: entities could not be resolved",
+                               head_text, relation_type, tail_text)
+            elif (entity_id_map[head_key], entity_id_map[tail_key], relation_type) not in inserted_relations:
+                logger.warning("Relation %s -> %s -> %s already exists", head_text, relation_type, tail_text)
+
+        batch_ids.update(entity_id_map)
+
+        return {
+            'entities_stored': len(inserted_entities),
+            'relations_stored': len(inserted_relations),
+            'total_entities': len(extraction_result.entities),
+            'total_relations': len(extraction_result.relations)
+        }
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get hit/miss statistics for the in-memory entity id cache."""
+        return self._entity_cache.stats()
 
     def get_document_graph(self, doc_id: str) -> Dict[str, Any]:
         """
@@ -169,8 +512,8 @@ class GraphDatabase:
         Returns:
             Dictionary containing entities and relations for the document
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Get entities for the document
                 cur.execute("""
                     SELECT id, name, entity_type, normalized_name, confidence, metadata
@@ -181,24 +524,25 @@ class GraphDatabase:
 
                 entities = cur.fetchall()
 
-                # Get relations for the document entities
-                cur.execute("""
-                    SELECT r.id, r.relation_type, r.confidence, r.source_text,
-                           he.name as head_entity_name, he.entity_type as head_entity_type,
-                           te.name as tail_entity_name, te.entity_type as tail_entity_type
-                    FROM relationships r
-                    JOIN entities he ON r.head_entity_id = he.id
-                    JOIN entities te ON r.tail_entity_id = te.id
-                    WHERE he.document_id = %s OR te.document_id = %s
-                    ORDER BY r.confidence DESC
-                """, (doc_id, doc_id))
+                # Get relations touching the document entities
+                relations = []
+                entity_ids = [entity['id'] for entity in entities]
+                if entity_ids:
+                    cur.execute("""
+                        SELECT id, relation_type, confidence, source_text,
+                               head_entity_name, head_entity_type,
+                               tail_entity_name, tail_entity_type
+                        FROM relationships
+                        WHERE head_entity_id = ANY(%s) OR tail_entity_id = ANY(%s)
+                        ORDER BY confidence DESC
+                    """, (entity_ids, entity_ids))
 
-                relations = cur.fetchall()
+                    relations = cur.fetchall()
 
                 return {
                     'document_id': doc_id,
-                    'entities': [dict(entity) for entity in entities],
-                    'relations': [dict(relation) for relation in relations]
+                    'entities': entities,
+                    'relations': relations
                 }
 
     def search_entities(self, search_term: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -212,13 +556,13 @@ class GraphDatabase:
         Returns:
             List of matching entities with relationship counts
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     SELECT * FROM find_entities_by_name(%s, 0.3, %s)
                 """, (search_term, limit))
 
-                return [dict(row) for row in cur.fetchall()]
+                return cur.fetchall()
 
     def get_entity_neighbors(self, entity_name: str, max_depth: int = 1) -> List[Dict[str, Any]]:
         """
@@ -231,8 +575,8 @@ class GraphDatabase:
         Returns:
             List of neighboring entities with relationship information
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # First find the entity ID
                 cur.execute("""
                     SELECT id FROM entities WHERE name = %s LIMIT 1
@@ -247,16 +591,76 @@ class GraphDatabase:
                     SELECT * FROM get_entity_neighbors(%s, %s)
                 """, (entity['id'], max_depth))
 
-                return [dict(row) for row in cur.fetchall()]
+                return cur.fetchall()
 
     def test_connection(self) -> bool:
         """Test database connection and basic functionality."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1")
                 result = cur.fetchone()
                 return result is not None
 
+    def _entities_query(self, limit: Optional[int] = None, offset: int = 0) -> str:
+        """Build the query listing all entities."""
+        query = """
+            SELECT id, name, entity_type, normalized_name,
+                   confidence, document_id, metadata, created_at
+            FROM entities
+            ORDER BY created_at DESC, name
+        """
+        if limit:
+            query += f" LIMIT {limit} OFFSET {offset}"
+        return query
+
+    def _relations_query(self, limit: Optional[int] = None, offset: int = 0) -> str:
+        """Build the query listing all relations with entity names."""
+        query = """
+            SELECT id, relation_type, confidence, source_text,
+                   metadata, created_at,
+                   head_entity_name, head_entity_type,
+                   tail_entity_name, tail_entity_type
+            FROM relationships
+            ORDER BY created_at DESC
+        """
+        if limit:
+            query += f" LIMIT {limit} OFFSET {offset}"
+        return query
+
+    def _stream(self, cursor_name: str, query: str) -> Iterator[Dict[str, Any]]:
+        """Yield rows of a query through a server-side cursor, STREAM_ITERSIZE rows at a time."""
+        with self.get_connection() as conn:
+            with conn.cursor(name=cursor_name, cursor_factory=RealDictCursor) as cur:
+                cur.itersize = STREAM_ITERSIZE
+                cur.execute(query)
+                yield from cur
+
+    def iter_all_entities(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Stream entities from the database without loading them all into memory.
+
+        Args:
+            limit: Maximum number of entities to return (None for all)
+            offset: Number of entities to skip
+
+        Yields:
+            Entity dictionaries
+        """
+        return self._stream('entity_stream', self._entities_query(limit, offset))
+
+    def iter_all_relations(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Stream relations with entity names without loading them all into memory.
+
+        Args:
+            limit: Maximum number of relations to return (None for all)
+            offset: Number of relations to skip
+
+        Yields:
+            Relation dictionaries with entity names
+        """
+        return self._stream('relation_stream', self._relations_query(limit, offset))
+
     def get_all_entities(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Get all entities from the database.
@@ -268,19 +672,7 @@ class GraphDatabase:
         Returns:
             List of entity dictionaries
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT id, name, entity_type, normalized_name,
-                           confidence, document_id, metadata, created_at
-                    FROM entities
-                    ORDER BY created_at DESC, name
-                """
-                if limit:
-                    query += f" LIMIT {limit} OFFSET {offset}"
-
-                cur.execute(query)
-                return [dict(row) for row in cur.fetchall()]
+        return list(self.iter_all_entities(limit, offset))
 
     def get_all_relations(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
@@ -293,33 +685,24 @@ class GraphDatabase:
         Returns:
             List of relation dictionaries with entity names
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT r.id, r.relation_type, r.confidence, r.source_text,
-                           r.metadata, r.created_at,
-                           he.name as head_entity_name, he.entity_type as head_entity_type,
-                           te.name as tail_entity_name, te.entity_type as tail_entity_type
-                    FROM relationships r
-                    JOIN entities he ON r.head_entity_id = he.id
-                    JOIN entities te ON r.tail_entity_id = te.id
-                    ORDER BY r.created_at DESC
-                """
-                if limit:
-                    query += f" LIMIT {limit} OFFSET {offset}"
-
-                cur.execute(query)
-                return [dict(row) for row in cur.fetchall()]
+        return list(self.iter_all_relations(limit, offset))
 
     def get_full_graph(self) -> Dict[str, Any]:
         """
         Get the complete graph with all entities and relations.
 
+        Both queries run back to back on a single pooled connection.
+
         Returns:
             Dictionary containing all entities and relations
         """
-        entities = self.get_all_entities()
-        relations = self.get_all_relations()
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(self._entities_query())
+                entities = cur.fetchall()
+
+                cur.execute(self._relations_query())
+                relations = cur.fetchall()
 
         return {
             'entities': entities,
@@ -330,17 +713,17 @@ class GraphDatabase:
 
     def get_entity_count(self) -> int:
         """Get total number of entities in the database."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) as count FROM entities")
-                return cur.fetchone()['count']
+                cur.execute("SELECT COUNT(*) FROM entities")
+                return cur.fetchone()[0]
 
     def get_relation_count(self) -> int:
         """Get total number of relations in the database."""
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True) as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) as count FROM relationships")
-                return cur.fetchone()['count']
+                cur.execute("SELECT COUNT(*) FROM relationships")
+                return cur.fetchone()[0]
 
     def get_entities_by_type(self, entity_type: str) -> List[Dict[str, Any]]:
         """
@@ -352,8 +735,8 @@ class GraphDatabase:
         Returns:
             List of entities of the specified type
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
                     SELECT id, name, entity_type, normalized_name,
                            confidence, document_id, metadata, created_at
@@ -361,7 +744,7 @@ class GraphDatabase:
                     WHERE entity_type = %s
                     ORDER BY name
                 """, (entity_type,))
-                return [dict(row) for row in cur.fetchall()]
+                return cur.fetchall()
 
     def get_relations_by_type(self, relation_type: str) -> List[Dict[str, Any]]:
         """
@@ -373,20 +756,18 @@ class GraphDatabase:
         Returns:
             List of relations of the specified type
         """
-        with self.get_connection() as conn:
-            with conn.cursor() as cur:
+        with self.get_connection(readonly=True) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 cur.execute("""
-                    SELECT r.id, r.relation_type, r.confidence, r.source_text,
-                           r.metadata, r.created_at,
-                           he.name as head_entity_name, he.entity_type as head_entity_type,
-                           te.name as tail_entity_name, te.entity_type as tail_entity_type
-                    FROM relationships r
-                    JOIN entities he ON r.head_entity_id = he.id
-                    JOIN entities te ON r.tail_entity_id = te.id
-                    WHERE r.relation_type = %s
-                    ORDER BY r.confidence DESC
+                    SELECT id, relation_type, confidence, source_text,
+                           metadata, created_at,
+                           head_entity_name, head_entity_type,
+                           tail_entity_name, tail_entity_type
+                    FROM relationships
+                    WHERE relation_type = %s
+                    ORDER BY confidence DESC
                 """, (relation_type,))
-                return [dict(row) for row in cur.fetchall()]
+                return cur.fetchall()
 
     def get_graph_statistics(self) -> Dict[str, Any]:
         """
@@ -395,50 +776,22 @@ class GraphDatabase:
         Returns:
             Dictionary with various graph statistics
         """
-        with self.get_connection() as conn:
+        # The queries scan different tables, so run them concurrently on separate backends
+        max_workers = min(len(STATISTICS_QUERIES), self.max_connections)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._run_scalar_query, query) for query in STATISTICS_QUERIES]
+            statistics = {}
+            for future in futures:
+                statistics.update(future.result())
+
+        return {key: statistics[key] for key in (
+            'total_entities', 'total_relations', 'total_documents',
+            'entity_types', 'relation_types', 'most_connected_entities'
+        )}
+
+    def _run_scalar_query(self, query: str, params: Optional[Tuple] = None) -> Any:
+        """Run a single-value query on its own pooled connection."""
+        with self.get_connection(readonly=True) as conn:
             with conn.cursor() as cur:
-                # Entity statistics
-                cur.execute("""
-                    SELECT entity_type, COUNT(*) as count
-                    FROM entities
-                    GROUP BY entity_type
-                    ORDER BY count DESC
-                """)
-                entity_type_counts = {row['entity_type']: row['count'] for row in cur.fetchall()}
-
-                # Relation statistics
-                cur.execute("""
-                    SELECT relation_type, COUNT(*) as count
-                    FROM relationships
-                    GROUP BY relation_type
-                    ORDER BY count DESC
-                """)
-                relation_type_counts = {row['relation_type']: row['count'] for row in cur.fetchall()}
-
-                # Document statistics
-                cur.execute("""
-                    SELECT COUNT(DISTINCT document_id) as doc_count
-                    FROM entities
-                """)
-                doc_count = cur.fetchone()['doc_count']
-
-                # Most connected entities
-                cur.execute("""
-                    SELECT e.name, e.entity_type,
-                           COUNT(DISTINCT r.id) as connection_count
-                    FROM entities e
-                    LEFT JOIN relationships r ON e.id = r.head_entity_id OR e.id = r.tail_entity_id
-                    GROUP BY e.id, e.name, e.entity_type
-                    ORDER BY connection_count DESC
-                    LIMIT 10
-                """)
-                most_connected = [dict(row) for row in cur.fetchall()]
-
-                return {
-                    'total_entities': self.get_entity_count(),
-                    'total_relations': self.get_relation_count(),
-                    'total_documents': doc_count,
-                    'entity_types': entity_type_counts,
-                    'relation_types': relation_type_counts,
-                    'most_connected_entities': most_connected
-                }
+                cur.execute(query, params)
+                return cur.fetchone()[0]
@@ -3,25 +3,88 @@
 Graph extraction module using GLiNER and GLiREL for entity and relation extraction.
 """
 
+import inspect
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from functools import cache
-from typing import List, Tuple, Generator
+from functools import cache, wraps
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, List, Optional, Tuple, Generator
 
 import glirel  # noqa: F401 Import time side effect
+import numpy as np
 import spacy
+import torch
 import logging
 from gliner import GLiNER
 from gliner.multitask import GLiNERRelationExtractor
 
+try:
+    from gliner import InferencePackingConfig
+except ImportError:  # GLiNER releases without inference-time sequence packing
+    InferencePackingConfig = None
+
 logger = logging.getLogger(__name__)
 
+# ONNX export of the multitask model to run through onnxruntime instead of PyTorch
+# (e.g. "model.onnx"); uses the CUDA execution provider when the device is CUDA
+MULTITASK_ONNX_MODEL_FILE = os.getenv("GLINER_ONNX_MODEL_FILE")
+
+# Capture the GLiNER forward pass as CUDA graphs and replay them instead of launching
+# every kernel per call; replaces inference packing, whose batch shapes never repeat
+GLINER_CUDA_GRAPHS = os.getenv("GLINER_CUDA_GRAPHS", "").lower() in ("1", "true", "yes")
+# Short text extracted once at warmup, so torch.compile runs before the first real batch
+WARMUP_TEXT = "Ada Lovelace worked with Charles Babbage in London on the Analytical Engine."
+
+# Model weight/compute dtypes by name; "auto" picks BF16 (or FP16) on CUDA and FP32 on CPU
+MODEL_DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16, "fp16": torch.float16}
+
+
+@cache
+def detect_device() -> str:
+    """Return "cuda" if a GPU is usable, otherwise "cpu". Checked once per process; mps is opt-in."""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
 # Default configuration
-DEFAULT_DEVICE = "cpu"  # Can be overridden with CUDA if available
-# Chunk sizes for different model types
-GLIREL_CHUNK_SIZE = 1600  # Smaller chunks for glirel due to 512 token limit
-# DEFAULT_CHUNK_SIZE = 10000  # Larger chunks for GLiNER-only models
-DEFAULT_CHUNK_SIZE = 3200  # Larger chunks for GLiNER-only models
-CHUNK_OVERLAP = 200  # Overlap between chunks to maintain context
+DEFAULT_DEVICE = detect_device()
+# Token-based chunking, measured with the model's own tokenizer
+TOKEN_CHUNK_SIZE = 384  # GLiNER's max_len; also well under the 512 token encoder limit
+TOKEN_CHUNK_OVERLAP = 64
+# gliner_spacy re-splits docs into pieces of this many characters. Token sized chunks are
+# far shorter, so each one stays a single forward pass and is only split if pathological.
+GLINER_SPACY_CHUNK_CHARS = TOKEN_CHUNK_SIZE * 16
+ENCODER_MAX_LENGTH = 512  # Packed stream length for inference-time sequence packing
+SENTENCIZER_BATCH_SIZE = 64
+SENTENCE_CACHE_SIZE = 128  # Recently split texts whose sentences are kept for re-chunking
+
+# Default entity and relation types for general knowledge extraction. Tuples so that
+# callers relying on the defaults always hit the same model cache key.
+_DEFAULT_ENTITY_TYPES = (
+    "PERSON", "ORGANIZATION", "LOCATION", "DATE", "TIME",
+    "MONEY", "PERCENT", "FACILITY", "EVENT", "PRODUCT",
+    "LAW", "LANGUAGE", "NORP"
+)
+_DEFAULT_RELATION_TYPES = (
+    "located_in", "part_of", "member_of", "founded_by", "born_in",
+    "died_in", "worked_for", "studied_at", "created_by", "owned_by",
+    "leads", "manages", "collaborates_with", "related_to", "caused_by"
+)
+
+# Serialises model loads so concurrent workers never build the same model twice
+_model_lock = threading.Lock()
+
+# Per-thread sentence splitter used by chunk_texts
+_sentencizer_local = threading.local()
+
+# text -> tuple of its sentences, least recently used first
+_sentence_cache = OrderedDict()
+_sentence_cache_lock = threading.Lock()
 
 
 @dataclass
@@ -32,72 +95,154 @@ class ExtractionResult:
     """
 
     entities: List[Tuple[str, str]]  # (text, label)
-    relations: List[Tuple[str, str, str]]  # (head_text, label, tail_text)
+    relations: List[Tuple[str, str, str, str, str]]  # (head_text, head_label, label, tail_text, tail_label)
 
 
-def chunk_text(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> Generator[str, None, None]:
-    """Split text into chunks while respecting sentence boundaries.
+def _sentencizer():
+    """Return this thread's blank English pipeline with a sentencizer, building it on first use."""
+    nlp = getattr(_sentencizer_local, "nlp", None)
+    if nlp is None:
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        _sentencizer_local.nlp = nlp
+    return nlp
 
-    Args:
-        text: The text to chunk
-        chunk_size: Target size for each chunk in characters
-        chunk_overlap: Number of characters to overlap between chunks
 
-    Yields:
-        Text chunks that respect sentence boundaries
+def _split_sentences(texts: List[str]) -> List[Tuple[str, ...]]:
+    """Split texts into stripped, non-empty sentences, reusing the sentences of recently split texts.
+
+    Texts not in the cache are sentencized together in one batched nlp.pipe call.
     """
-    # Use spacy for sentence segmentation
-    nlp = spacy.blank("en")
-    nlp.add_pipe("sentencizer")
-    doc = nlp(text)
-    sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+    with _sentence_cache_lock:
+        sentences = []
+        for text in texts:
+            cached = _sentence_cache.get(text)
+            if cached is not None:
+                _sentence_cache.move_to_end(text)
+            sentences.append(cached)
+
+    missing = list(dict.fromkeys(text for text, cached in zip(texts, sentences) if cached is None))
+    if not missing:
+        return sentences
+
+    split = {
+        text: tuple(sent.text.strip() for sent in doc.sents if sent.text.strip())
+        for text, doc in zip(missing, _sentencizer().pipe(missing, batch_size=SENTENCIZER_BATCH_SIZE))
+    }
+    with _sentence_cache_lock:
+        _sentence_cache.update(split)
+        while len(_sentence_cache) > SENTENCE_CACHE_SIZE:
+            _sentence_cache.popitem(last=False)
 
-    if not sentences:
-        return
+    return [cached if cached is not None else split[text] for text, cached in zip(texts, sentences)]
 
-    current_chunk = []
-    current_size = 0
 
-    for sentence in sentences:
-        sentence_size = len(sentence) + 1  # +1 for space
+def _pack_sentences(sentences: List[str], sizes: List[int], chunk_size: int, chunk_overlap: int) -> Generator[str, None, None]:
+    """Greedily pack sentences into chunks of at most chunk_size, overlapping by up to chunk_overlap."""
+    current_chunk = []  # (sentence, size) pairs
+    current_size = 0
 
+    for sentence, sentence_size in zip(sentences, sizes):
         # If adding this sentence would exceed chunk_size, yield current chunk
         if current_size + sentence_size > chunk_size and current_chunk:
-            yield " ".join(current_chunk)
+            yield " ".join(sent for sent, _ in current_chunk)
 
             # Handle overlap by keeping some sentences from the end
             overlap_chunk = []
             overlap_size = 0
 
             # Add sentences from the end until we reach overlap size
-            for sent in reversed(current_chunk):
-                sent_size = len(sent) + 1
+            for sent, sent_size in reversed(current_chunk):
                 if overlap_size + sent_size <= chunk_overlap:
-                    overlap_chunk.insert(0, sent)
+                    overlap_chunk.insert(0, (sent, sent_size))
                     overlap_size += sent_size
                 else:
                     break
 
-            current_chunk = overlap_chunk + [sentence]
+            # Drop the overlap when it would push the new chunk past chunk_size
+            if overlap_size + sentence_size > chunk_size:
+                overlap_chunk = []
+                overlap_size = 0
+
+            current_chunk = overlap_chunk + [(sentence, sentence_size)]
             current_size = overlap_size + sentence_size
         else:
-            current_chunk.append(sentence)
+            current_chunk.append((sentence, sentence_size))
             current_size += sentence_size
 
     # Don't forget the last chunk
     if current_chunk:
-        yield " ".join(current_chunk)
+        yield " ".join(sent for sent, _ in current_chunk)
+
+
+def _split_long_sentences(sentences: Tuple[str, ...], lengths: List[int], offsets: List[List[Tuple[int, int]]],
+                          max_tokens: int) -> Tuple[List[str], List[int]]:
+    """Split sentences longer than max_tokens at token boundaries, returning the pieces and their sizes."""
+    pieces = []
+    sizes = []
+    for sentence, length, sentence_offsets in zip(sentences, lengths, offsets):
+        if length <= max_tokens:
+            pieces.append(sentence)
+            sizes.append(length)
+            continue
+        for start in range(0, length, max_tokens):
+            window = sentence_offsets[start:start + max_tokens]
+            pieces.append(sentence[window[0][0]:window[-1][1]])
+            sizes.append(len(window))
+    return pieces, sizes
+
+
+def chunk_texts(
+    texts: List[str],
+    tokenizer,
+    max_tokens: int = TOKEN_CHUNK_SIZE,
+    overlap_tokens: int = TOKEN_CHUNK_OVERLAP,
+) -> Generator[List[str], None, None]:
+    """Split texts into chunks of whole sentences, sized by real token counts.
+
+    Texts not split recently are sentencized in one batched nlp.pipe call, and the
+    sentences of all texts are measured with a single batched tokenizer call.
+    Sentences longer than max_tokens are split at token boundaries.
 
+    Args:
+        texts: The texts to chunk
+        tokenizer: Hugging Face tokenizer of the model the chunks are fed to
+        max_tokens: Maximum number of tokens per chunk
+        overlap_tokens: Number of tokens to overlap between chunks
 
-def merge_extraction_results(results: List[ExtractionResult]) -> ExtractionResult:
-    """Merge multiple extraction results, removing duplicates."""
-    # Use sets to remove duplicates
-    all_entities = set()
-    all_relations = set()
+    Yields:
+        The list of chunks for each text, in input order
+    """
+    split = _split_sentences(texts)
+    all_sentences = [sentence for sentences in split for sentence in sentences]
+    if all_sentences:
+        encoding = tokenizer(all_sentences, add_special_tokens=False, return_length=True,
+                             return_offsets_mapping=True)
+        lengths, offsets = encoding["length"], encoding["offset_mapping"]
+    else:
+        lengths, offsets = [], []
+
+    start = 0
+    for sentences in split:
+        end = start + len(sentences)
+        pieces, sizes = _split_long_sentences(sentences, lengths[start:end], offsets[start:end], max_tokens)
+        yield list(_pack_sentences(pieces, sizes, max_tokens, overlap_tokens))
+        start = end
+
+
+def merge_extraction_results(results: Iterable[ExtractionResult]) -> ExtractionResult:
+    """Merge multiple extraction results, removing duplicates.
+
+    Results are folded in as they are consumed, so a generator of per-chunk
+    results is never held in memory all at once.
+    """
+    # Use dicts to remove duplicates while keeping first-seen order
+    all_entities = {}
+    all_relations = {}
 
     for result in results:
-        all_entities.update(result.entities)
-        all_relations.update(result.relations)
+        all_entities.update(dict.fromkeys(result.entities))
+        all_relations.update(dict.fromkeys(result.relations))
 
     return ExtractionResult(
         entities=list(all_entities),
@@ -105,12 +250,61 @@ def merge_extraction_results(results: List[ExtractionResult]) -> ExtractionResul
     )
 
 
+def _cache_key(value):
+    """Make a loader argument hashable, turning lists (e.g. of labels) into tuples."""
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _load_once(loader):
+    """Cache a model loader by its arguments, loading each model at most once across threads.
+
+    Arguments are bound to the loader's signature with defaults applied, so positional,
+    keyword and defaulted calls for the same model share one instance.
+    """
+    signature = inspect.signature(loader)
+    models = {}
+
+    @wraps(loader)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple(_cache_key(value) for value in bound.arguments.values())
+        model = models.get(key)
+        if model is None:
+            with _model_lock:
+                model = models.get(key)
+                if model is None:
+                    model = models[key] = loader(*bound.args, **bound.kwargs)
+        return model
+
+    return wrapper
+
+
+@cache
+def _enable_tf32() -> None:
+    """Let any matmuls left in FP32 by autocast use TF32 tensor cores, once per process."""
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+
+
 @cache
-def nlp_model(threshold: float, entity_types: tuple[str], model_name: str = "urchade/gliner_mediumv2.1", device: str = DEFAULT_DEVICE):
-    """Instantiate a spacy model with GLiNER and GLiREL components."""
+def _enable_spacy_gpu() -> None:
+    """Switch spaCy to GPU mode, once per process; this needs cupy, unlike torch."""
+    try:
+        spacy.require_gpu()  # type: ignore
+    except ValueError as e:
+        raise RuntimeError(
+            "spaCy GPU mode requires cupy matching your CUDA version (e.g. pip install cupy-cuda12x)"
+        ) from e
+    _enable_tf32()
+
+
+@_load_once
+def nlp_model(threshold: float, entity_types: tuple[str], model_name: str = "urchade/gliner_mediumv2.1", device: str = DEFAULT_DEVICE, dtype: str = "auto"):
+    """Instantiate a spacy model with GLiNER and GLiREL components, with GLiNER weights in dtype."""
     custom_spacy_config = {
         "gliner_model": model_name,
-        "chunk_size": 250,
+        "chunk_size": GLINER_SPACY_CHUNK_CHARS,
         "labels": entity_types,
         "style": "ent",
         "threshold": threshold,
@@ -119,19 +313,214 @@ def nlp_model(threshold: float, entity_types: tuple[str], model_name: str = "urc
 
     # Only require GPU if CUDA device is specified
     if device.startswith("cuda"):
-        spacy.require_gpu()  # type: ignore
+        _enable_spacy_gpu()
 
     nlp = spacy.blank("en")
     nlp.add_pipe("gliner_spacy", config=custom_spacy_config)
     nlp.add_pipe("glirel", after="gliner_spacy")
+
+    gliner = nlp.get_pipe("gliner_spacy").model
+    compute_dtype = model_dtype(dtype, device)
+    if compute_dtype != torch.float32:
+        gliner.to(dtype=compute_dtype)
+    if GLINER_CUDA_GRAPHS and device.startswith("cuda"):
+        _compile_cuda_graphs(gliner)
     return nlp
 
 
+def _compile_cuda_graphs(model) -> None:
+    """Compile a GLiNER model's forward pass to record and replay CUDA graphs."""
+    # "reduce-overhead" records a CUDA graph per input shape on first use and replays it after
+    compiled = torch.compile(model.model, mode="reduce-overhead")
+    # Tracing happens lazily on each new input shape, so capture_scalar_outputs is patched
+    # around every call of this model only, not for other torch.compile users in the process
+    compiled.forward = torch._dynamo.config.patch(capture_scalar_outputs=True)(compiled.forward)
+    model.model = compiled
+
+
+def half_precision_dtype() -> torch.dtype:
+    """BF16 where the GPU supports it, FP16 otherwise."""
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+def _mps_autocast_available() -> bool:
+    """Whether torch.autocast supports MPS; torch.amp.is_autocast_available itself is new in 2.4."""
+    is_autocast_available = getattr(torch.amp, "is_autocast_available", None)
+    return is_autocast_available is not None and is_autocast_available("mps")
+
+
 @cache
-def multitask_model(model_name: str, device: str = DEFAULT_DEVICE):
-    """Instantiate a GLiNER multitask model for direct extraction."""
-    model = GLiNER.from_pretrained(model_name, map_location=device)
-    return GLiNERRelationExtractor(model=model)
+def model_dtype(dtype: str = "auto", device: str = DEFAULT_DEVICE) -> torch.dtype:
+    """
+    Resolve a MODEL_DTYPES name, or "auto", to the dtype models run in on device.
+
+    "auto" is BF16 (or FP16) on CUDA and FP16 on MPS. Half precision is only used
+    on GPUs, and BF16 falls back to FP32 on GPUs without native support (pre-Ampere, MPS).
+    MPS also stays in FP32 on torch builds without MPS autocast (before 2.5).
+    """
+    if device.startswith("mps"):
+        if not _mps_autocast_available():
+            if dtype not in ("auto", "fp32"):
+                logger.warning(f"This torch has no MPS autocast, running {dtype} on mps in fp32")
+            return torch.float32
+        if dtype == "bf16":
+            logger.warning("MPS has no native bf16 support, running in fp32")
+            return torch.float32
+        return torch.float16 if dtype == "auto" else MODEL_DTYPES[dtype]
+    if not device.startswith("cuda"):
+        if dtype not in ("auto", "fp32"):
+            logger.warning(f"{dtype} is only used on GPUs, running on {device} in fp32")
+        return torch.float32
+    if dtype == "auto":
+        return half_precision_dtype()
+
+    resolved = MODEL_DTYPES[dtype]
+    if resolved == torch.bfloat16 and not torch.cuda.is_bf16_supported():
+        logger.warning("This GPU has no native bf16 support, running in fp32")
+        return torch.float32
+    return resolved
+
+
+@contextmanager
+def inference_context(device: str = DEFAULT_DEVICE, dtype: str = "auto"):
+    """Run model calls without autograd, under autocast to dtype when it is a half precision type."""
+    compute_dtype = model_dtype(dtype, device)
+    with torch.inference_mode():
+        if compute_dtype != torch.float32:
+            with torch.autocast(torch.device(device).type, dtype=compute_dtype):
+                yield
+        else:
+            yield
+
+
+@_load_once
+def multitask_model(model_name: str, device: str = DEFAULT_DEVICE, dtype: str = "auto",
+                    onnx_model_file: Optional[str] = None):
+    """
+    Instantiate a GLiNER multitask model for direct extraction.
+
+    The weights are cast to dtype (see model_dtype); by default BF16/FP16 on
+    CUDA and FP16 on MPS, while CPU inference stays in FP32. Set GLINER_CUDA_GRAPHS=1 to replay the forward
+    pass from captured CUDA graphs instead of using sequence packing.
+    onnx_model_file (default: GLINER_ONNX_MODEL_FILE) runs the model through
+    onnxruntime instead, on its CUDA execution provider when the device is CUDA.
+    """
+    if device.startswith("cuda"):
+        _enable_tf32()
+
+    onnx_model_file = onnx_model_file or MULTITASK_ONNX_MODEL_FILE
+    if onnx_model_file:
+        model = GLiNER.from_pretrained(model_name, load_onnx_model=True,
+                                       onnx_model_file=onnx_model_file, map_location=device)
+    else:
+        # Fused scaled_dot_product_attention kernels in the encoder; not every backbone has them
+        try:
+            model = GLiNER.from_pretrained(model_name, map_location=device, _attn_implementation="sdpa")
+        except ValueError as e:
+            logger.info(f"SDPA attention unavailable for {model_name}, using the default: {e}")
+            model = GLiNER.from_pretrained(model_name, map_location=device)
+        compute_dtype = model_dtype(dtype, device)
+        if compute_dtype != torch.float32:
+            model = model.to(dtype=compute_dtype)
+        if GLINER_CUDA_GRAPHS and device.startswith("cuda"):
+            _compile_cuda_graphs(model)
+        # Pack several short chunks into one encoder sequence instead of padding each
+        elif InferencePackingConfig is not None:
+            model.configure_inference_packing(InferencePackingConfig(max_length=ENCODER_MAX_LENGTH))
+
+    # The pipeline moves the model to its own device, which defaults to cuda:0
+    return GLiNERRelationExtractor(model=model, device=device)
+
+
+def _passing_indices(items: list, threshold: float, by_score: bool = False) -> np.ndarray:
+    """Indices of the items whose "score" is at least threshold, optionally ordered by descending score."""
+    scores = np.fromiter((item["score"] for item in items), dtype=np.float64, count=len(items))
+    kept = np.flatnonzero(scores >= threshold)
+    if by_score:
+        kept = kept[np.argsort(-scores[kept], kind="stable")]
+    return kept
+
+
+def _predictions_to_result(predictions, threshold: float) -> ExtractionResult:
+    """Convert multitask model predictions for one text into an ExtractionResult."""
+    logger.debug("Predictions: %s", predictions)
+
+    # Handle different prediction formats
+    entities = []
+    relations = []
+
+    # If predictions is a list (multitask model format)
+    if isinstance(predictions, list):
+        # Each prediction has source, relation, target, score
+        preds = [
+            pred for pred in predictions
+            if isinstance(pred, dict) and all(k in pred for k in ["source", "relation", "target", "score"])
+        ]
+        relations = [
+            (preds[i]["source"], "ENTITY", preds[i]["relation"], preds[i]["target"], "ENTITY")
+            for i in _passing_indices(preds, threshold)
+        ]
+        # Also extract entities from every relation, keeping first-seen order
+        entities = list(dict.fromkeys(
+            (name, "ENTITY") for pred in preds for name in (pred["source"], pred["target"])
+        ))
+    # If predictions is a dict (standard format)
+    elif isinstance(predictions, dict):
+        entities = list(dict.fromkeys(
+            (ent["text"], ent["label"]) for ent in predictions.get("entities", [])
+        ))
+        entity_labels = dict(entities)
+        rels = predictions.get("relations", [])
+        relations = [
+            (rels[i]["head"]["text"], entity_labels.get(rels[i]["head"]["text"]), rels[i]["relation"],
+             rels[i]["tail"]["text"], entity_labels.get(rels[i]["tail"]["text"]))
+            for i in _passing_indices(rels, threshold)
+        ]
+
+    return ExtractionResult(entities=entities, relations=relations)
+
+
+def extract_with_multitask_batch(
+    texts: List[str],
+    entity_types: List[str],
+    relation_types: List[str],
+    threshold: float,
+    model_name: str,
+    device: str = DEFAULT_DEVICE,
+    batch_size: int = 8,
+    onnx_model_file: Optional[str] = None,
+    dtype: str = "auto",
+) -> List[ExtractionResult]:
+    """Extract entities and relations from several texts using GLiNER multitask model.
+
+    The chunks of all texts go through one pipeline call, so batches are filled
+    across text boundaries instead of one text at a time.
+
+    Returns:
+        One ExtractionResult per input text, in the same order
+    """
+    extractor = multitask_model(model_name, device, dtype, onnx_model_file)
+    tokenizer = extractor.model.data_processor.transformer_tokenizer
+
+    # Every chunk, tagged with the text it came from
+    chunks = [
+        (index, chunk)
+        for index, text_chunks in enumerate(chunk_texts(texts, tokenizer))
+        for chunk in text_chunks
+    ]
+
+    per_text = [[] for _ in texts]
+    if chunks:
+        # Similar lengths batch and pack more densely; chunk order doesn't matter once merged
+        chunks.sort(key=lambda owned: len(owned[1]))
+
+        # The pipeline returns one prediction list per chunk
+        predictions = extractor([chunk for _, chunk in chunks], entities=entity_types,
+                                relations=relation_types, threshold=threshold, batch_size=batch_size)
+        for (owner, _), chunk_predictions in zip(chunks, predictions):
+            per_text[owner].append(_predictions_to_result(chunk_predictions, threshold))
+
+    return [merge_extraction_results(results) for results in per_text]
 
 
 def extract_with_multitask(
@@ -141,166 +530,190 @@ def extract_with_multitask(
     threshold: float,
     model_name: str,
     device: str = DEFAULT_DEVICE,
+    batch_size: int = 8,
 ) -> ExtractionResult:
     """Extract entities and relations using GLiNER multitask model."""
-    extractor = multitask_model(model_name, device)
-
-    # Check if text needs chunking
-    if len(text) <= DEFAULT_CHUNK_SIZE:
-        # Process as single chunk
-        predictions = extractor(text, entities=entity_types, relations=relation_types, threshold=threshold)
-        logger.info(f"Predictions: {predictions}")
-
-        # Handle different prediction formats
-        entities = []
-        relations = []
-        
-        # If predictions is a list (multitask model format)
-        if isinstance(predictions, list):
-            for pred in predictions:
-                if isinstance(pred, dict):
-                    # Each prediction has source, relation, target, score
-                    if all(k in pred for k in ["source", "relation", "target", "score"]):
-                        if pred["score"] >= threshold:
-                            relations.append((pred["source"], pred["relation"], pred["target"]))
-                        # Also extract entities from relations
-                        entities.append((pred["source"], "ENTITY"))
-                        entities.append((pred["target"], "ENTITY"))
-        # If predictions is a dict (standard format)
-        elif isinstance(predictions, dict):
-            entities = [(ent["text"], ent["label"]) for ent in predictions.get("entities", [])]
-            relations = [
-                (rel["head"]["text"], rel["relation"], rel["tail"]["text"])
-                for rel in predictions.get("relations", [])
-                if rel["score"] >= threshold
-            ]
-        
-        # Remove duplicate entities
-        entities = list(set(entities))
-
-        return ExtractionResult(entities=entities, relations=relations)
-
-    # Process in chunks
-    chunk_results = []
-    for chunk in chunk_text(text, DEFAULT_CHUNK_SIZE, CHUNK_OVERLAP):
-        predictions = extractor(chunk, entities=entity_types, relations=relation_types, threshold=threshold)
-        logger.info(f"Predictions: {predictions}")
-
-        # Handle different prediction formats
-        entities = []
-        relations = []
-        
-        # If predictions is a list (multitask model format)
-        if isinstance(predictions, list):
-            for pred in predictions:
-                if isinstance(pred, dict):
-                    # Each prediction has source, relation, target, score
-                    if all(k in pred for k in ["source", "relation", "target", "score"]):
-                        if pred["score"] >= threshold:
-                            relations.append((pred["source"], pred["relation"], pred["target"]))
-                        # Also extract entities from relations
-                        entities.append((pred["source"], "ENTITY"))
-                        entities.append((pred["target"], "ENTITY"))
-        # If predictions is a dict (standard format)
-        elif isinstance(predictions, dict):
-            entities = [(ent["text"], ent["label"]) for ent in predictions.get("entities", [])]
-            relations = [
-                (rel["head"]["text"], rel["relation"], rel["tail"]["text"])
-                for rel in predictions.get("relations", [])
-                if rel["score"] >= threshold
-            ]
-        
-        # Remove duplicate entities
-        entities = list(set(entities))
-
-        chunk_results.append(ExtractionResult(entities=entities, relations=relations))
-
-    return merge_extraction_results(chunk_results)
+    return extract_with_multitask_batch(
+        [text], entity_types, relation_types, threshold, model_name, device, batch_size
+    )[0]
 
 
-def extract_rels(
-    text: str,
+def _doc_to_result(doc, threshold: float) -> ExtractionResult:
+    """Convert a processed spaCy doc into an ExtractionResult."""
+    # Drop low-scoring relations with a vectorized mask, then order the rest by descending score
+    relations = doc._.relations
+    kept_relations = [relations[i] for i in _passing_indices(relations, threshold, by_score=True)]
+
+    # Extract entities
+    ents = [(ent.text, ent.label_) for ent in doc.ents]
+    entity_labels = dict(ents)
+
+    # Extract relations, tagging both ends with their entity label
+    rels = []
+    for item in kept_relations:
+        head_text = " ".join(item["head_text"])
+        tail_text = " ".join(item["tail_text"])
+        rels.append((head_text, entity_labels.get(head_text), item["label"],
+                     tail_text, entity_labels.get(tail_text)))
+
+    return ExtractionResult(entities=ents, relations=rels)
+
+
+def extract_rels_batch(
+    texts: List[str],
     entity_types: List[str] = None,
     relation_types: List[str] = None,
     threshold: float = 0.75,
     model_name: str = "urchade/gliner_mediumv2.1",
     device: str = DEFAULT_DEVICE,
-) -> ExtractionResult:
-    """Extract entities and relations from text using GLiNER and GLiREL."""
+    batch_size: int = 16,
+    onnx_model_file: Optional[str] = None,
+    dtype: str = "auto",
+) -> List[ExtractionResult]:
+    """
+    Extract entities and relations from several texts in batched model calls.
+
+    The chunks of all texts are streamed through a single nlp.pipe call, so
+    the models run on batches of up to batch_size chunks instead of one at a time.
+    onnx_model_file only applies to the multitask model; dtype is one of
+    MODEL_DTYPES or "auto".
 
-    # Default entity and relation types for general knowledge extraction
+    Returns:
+        One ExtractionResult per input text, in the same order
+    """
     if entity_types is None:
-        entity_types = [
-            "PERSON", "ORGANIZATION", "LOCATION", "DATE", "TIME",
-            "MONEY", "PERCENT", "FACILITY", "EVENT", "PRODUCT",
-            "LAW", "LANGUAGE", "NORP"
-        ]
+        entity_types = _DEFAULT_ENTITY_TYPES
 
     if relation_types is None:
-        relation_types = [
-            "located_in", "part_of", "member_of", "founded_by", "born_in",
-            "died_in", "worked_for", "studied_at", "created_by", "owned_by",
-            "leads", "manages", "collaborates_with", "related_to", "caused_by"
-        ]
+        relation_types = list(_DEFAULT_RELATION_TYPES)
 
     # Check if model name contains 'multi' for multitask model
     if 'multi' in model_name.lower():
-        return extract_with_multitask(
-            text=text,
-            entity_types=entity_types,
-            relation_types=relation_types,
-            threshold=threshold,
-            model_name=model_name,
-            device=device
-        )
-
-    # Use spacy pipeline for other models - need chunking for glirel
-    chunk_size = GLIREL_CHUNK_SIZE  # Use smaller chunks due to glirel's 512 token limit
-
-    # Check if text needs chunking
-    if len(text) <= chunk_size:
-        # Process as single chunk
-        nlp = nlp_model(threshold, tuple(entity_types), model_name, device)
-        docs = list(nlp.pipe([(text, {"glirel_labels": relation_types})], as_tuples=True))
-        relations = docs[0][0]._.relations
+        with inference_context(device, dtype):
+            return extract_with_multitask_batch(
+                texts,
+                entity_types=list(entity_types),
+                relation_types=relation_types,
+                threshold=threshold,
+                model_name=model_name,
+                device=device,
+                onnx_model_file=onnx_model_file,
+                dtype=dtype
+            )
+
+    # Use spacy pipeline for other models - need chunking for glirel's 512 token limit
+    nlp = nlp_model(threshold, tuple(entity_types), model_name, device, dtype)
+    tokenizer = nlp.get_pipe("gliner_spacy").model.data_processor.transformer_tokenizer
+
+    # Split every text into chunks, remembering which text each chunk came from
+    chunks = []
+    owners = []
+    for index, text_chunks in enumerate(chunk_texts(texts, tokenizer)):
+        for chunk in text_chunks:
+            chunks.append((chunk, {"glirel_labels": relation_types}))
+            owners.append(index)
+
+    # Texts without any chunks (empty text) keep an empty result
+    results = [ExtractionResult(entities=[], relations=[]) for _ in texts]
+    with inference_context(device, dtype):
+        docs = zip(owners, nlp.pipe(chunks, as_tuples=True, batch_size=batch_size))
+        # A text's chunks are consecutive in the stream, so each text is merged as its docs arrive
+        for owner, owned_docs in groupby(docs, key=itemgetter(0)):
+            results[owner] = merge_extraction_results(
+                _doc_to_result(doc, threshold) for _, (doc, _) in owned_docs
+            )
+
+    return results
 
-        sorted_data_desc = sorted(relations, key=lambda x: x["score"], reverse=True)
 
-        # Extract entities
-        ents = [(ent.text, ent.label_) for ent in docs[0][0].ents]
-
-        # Extract relations
-        rels = [
-            (" ".join(item["head_text"]), item["label"], " ".join(item["tail_text"]))
-            for item in sorted_data_desc
-            if item["score"] >= threshold
-        ]
-
-        return ExtractionResult(entities=ents, relations=rels)
-
-    # Process in chunks for longer text
-    nlp = nlp_model(threshold, tuple(entity_types), model_name, device)
-    chunk_results = []
+def extract_rels(
+    text: str,
+    entity_types: List[str] = None,
+    relation_types: List[str] = None,
+    threshold: float = 0.75,
+    model_name: str = "urchade/gliner_mediumv2.1",
+    device: str = DEFAULT_DEVICE,
+) -> ExtractionResult:
+    """Extract entities and relations from text using GLiNER and GLiREL."""
+    return extract_rels_batch(
+        [text],
+        entity_types=entity_types,
+        relation_types=relation_types,
+        threshold=threshold,
+        model_name=model_name,
+        device=device
+    )[0]
 
-    for chunk in chunk_text(text, chunk_size, CHUNK_OVERLAP):
-        docs = list(nlp.pipe([(chunk, {"glirel_labels": relation_types})], as_tuples=True))
-        relations = docs[0][0]._.relations
 
-        sorted_data_desc = sorted(relations, key=lambda x: x["score"], reverse=True)
+def warmup(
+    model_name: str = "urchade/gliner_mediumv2.1",
+    device: str = DEFAULT_DEVICE,
+    threshold: float = 0.75,
+    entity_types: List[str] = None,
+    onnx_model_file: Optional[str] = None,
+    dtype: str = "auto",
+) -> None:
+    """Load the extraction model ahead of time so the first document doesn't pay for it.
 
-        # Extract entities
-        ents = [(ent.text, ent.label_) for ent in docs[0][0].ents]
+    With GLINER_CUDA_GRAPHS the model is also run once, so compilation happens here too.
+    """
+    entity_types = _DEFAULT_ENTITY_TYPES if entity_types is None else entity_types
+    if 'multi' in model_name.lower():
+        multitask_model(model_name, device, dtype, onnx_model_file)
+        compiled = GLINER_CUDA_GRAPHS and not (onnx_model_file or MULTITASK_ONNX_MODEL_FILE)
+    else:
+        if onnx_model_file:
+            logger.warning(f"ONNX inference is only supported for multitask models, loading {model_name} with PyTorch")
+            onnx_model_file = None
+        nlp_model(threshold, tuple(entity_types), model_name, device, dtype)
+        compiled = GLINER_CUDA_GRAPHS
+
+    if compiled and device.startswith("cuda"):
+        extract_rels_batch([WARMUP_TEXT], list(entity_types), threshold=threshold, model_name=model_name,
+                           device=device, onnx_model_file=onnx_model_file, dtype=dtype)
+
+
+def extract_graphs_from_documents(
+    documents: List[Tuple[str, str, str]],
+    entity_types: List[str] = None,
+    relation_types: List[str] = None,
+    threshold: float = 0.75,
+    model_name: str = "urchade/gliner_mediumv2.1",
+    device: str = DEFAULT_DEVICE,
+    batch_size: int = 16,
+    onnx_model_file: Optional[str] = None,
+    dtype: str = "auto",
+) -> List[ExtractionResult]:
+    """
+    Extract graph primitives from several documents in batched model calls.
 
-        # Extract relations
-        rels = [
-            (" ".join(item["head_text"]), item["label"], " ".join(item["tail_text"]))
-            for item in sorted_data_desc
-            if item["score"] >= threshold
-        ]
+    Args:
+        documents: List of (doc_id, title, content) tuples
+        entity_types: List of entity types to extract
+        relation_types: List of relation types to extract
+        threshold: Confidence threshold for extraction
+        device: Device to run extraction on
+        batch_size: Number of text chunks per model call
+        onnx_model_file: ONNX file to run the multitask model from through onnxruntime
+        dtype: Model dtype, one of MODEL_DTYPES or "auto"
 
-        chunk_results.append(ExtractionResult(entities=ents, relations=rels))
+    Returns:
+        One ExtractionResult per document, in the same order
+    """
+    # Combine title and content for extraction
+    texts = [f"{title}. {content}" if title else content for _, title, content in documents]
 
-    return merge_extraction_results(chunk_results)
+    return extract_rels_batch(
+        texts,
+        entity_types=entity_types,
+        relation_types=relation_types,
+        threshold=threshold,
+        model_name=model_name,
+        device=device,
+        batch_size=batch_size,
+        onnx_model_file=onnx_model_file,
+        dtype=dtype
+    )
 
 
 def extract_graph_from_document(
@@ -328,14 +741,96 @@ def extract_graph_from_document(
     Returns:
         ExtractionResult containing entities and relations
     """
-    # Combine title and content for extraction
-    full_text = f"{title}. {content}" if title else content
-
-    return extract_rels(
-        text=full_text,
+    return extract_graphs_from_documents(
+        [(doc_id, title, content)],
         entity_types=entity_types,
         relation_types=relation_types,
         threshold=threshold,
         model_name=model_name,
         device=device
-    )
+    )[0]
+
+
+@dataclass(frozen=True)
+class GraphExtractor:
+    """A graph extraction model configuration whose models are loaded once, on creation.
+
+    Pass one around instead of the model name, device and precision settings;
+    every extraction call reuses the already loaded models.
+    """
+
+    model_name: str = "urchade/gliner_mediumv2.1"
+    device: str = DEFAULT_DEVICE
+    threshold: float = 0.75
+    entity_types: Optional[Tuple[str, ...]] = None
+    relation_types: Optional[Tuple[str, ...]] = None
+    onnx_model_file: Optional[str] = None
+    dtype: str = "auto"
+    batch_size: int = 16
+
+    def __post_init__(self):
+        warmup(self.model_name, self.device, self.threshold, self.entity_types,
+               onnx_model_file=self.onnx_model_file, dtype=self.dtype)
+
+    def extract_batch(self, documents: List[Tuple[str, str, str]]) -> List[ExtractionResult]:
+        """Extract graph primitives from (doc_id, title, content) documents, one result per document."""
+        return extract_graphs_from_documents(
+            documents,
+            entity_types=self.entity_types,
+            relation_types=None if self.relation_types is None else list(self.relation_types),
+            threshold=self.threshold,
+            model_name=self.model_name,
+            device=self.device,
+            batch_size=self.batch_size,
+            onnx_model_file=self.onnx_model_file,
+            dtype=self.dtype
+        )
+
+    def extract(self, doc_id: str, title: str, content: str) -> ExtractionResult:
+        """Extract graph primitives from a single document."""
+        return self.extract_batch([(doc_id, title, content)])[0]
+
+
+# The GraphExtractor of a ProcessPoolExtractor worker process
+_process_extractor = None
+
+
+def _init_extraction_process(config: dict, torch_threads: int) -> None:
+    """Load a worker process's own model replica, limited to its share of the CPU cores."""
+    global _process_extractor
+    torch.set_num_threads(torch_threads)
+    _process_extractor = GraphExtractor(**config)
+
+
+def _extract_in_process(documents: List[Tuple[str, str, str]]) -> List[ExtractionResult]:
+    return _process_extractor.extract_batch(documents)
+
+
+class ProcessPoolExtractor:
+    """Run GraphExtractor.extract_batch in worker processes, each with its own model replica.
+
+    PyTorch's CPU forward pass holds the GIL for much of its work, so threads
+    sharing one model barely scale across cores; separate processes do. Each
+    process gets an equal share of the cores for torch's intra-op threads.
+    """
+
+    def __init__(self, workers: int, **config):
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # Forking after torch and the indexer's threads have started isn't safe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_extraction_process,
+            initargs=(config, max(1, (os.cpu_count() or 1) // workers)),
+        )
+
+    def extract_batch(self, documents: List[Tuple[str, str, str]]) -> List[ExtractionResult]:
+        """Extract graph primitives from (doc_id, title, content) documents in a worker process."""
+        return self.executor.submit(_extract_in_process, documents).result()
+
+    def extract(self, doc_id: str, title: str, content: str) -> ExtractionResult:
+        """Extract graph primitives from a single document."""
+        return self.extract_batch([(doc_id, title, content)])[0]
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self.executor.shutdown()
@@ -0,0 +1,76 @@
+-- Migration 003: Denormalize entity names and types onto relationships
+-- Relation reads only need the name and type of both endpoints, so copying them
+-- onto each relationship row lets those queries skip the double JOIN on entities
+
+ALTER TABLE relationships
+    ADD COLUMN head_entity_name VARCHAR(500),
+    ADD COLUMN head_entity_type VARCHAR(100),
+    ADD COLUMN tail_entity_name VARCHAR(500),
+    ADD COLUMN tail_entity_type VARCHAR(100);
+
+-- Backfill existing relationships
+UPDATE relationships r
+SET head_entity_name = he.name,
+    head_entity_type = he.entity_type,
+    tail_entity_name = te.name,
+    tail_entity_type = te.entity_type
+FROM entities he, entities te
+WHERE r.head_entity_id = he.id
+    AND r.tail_entity_id = te.id;
+
+-- Fill the copies on insert from the referenced entities (primary key lookups, no extra round trip)
+CREATE OR REPLACE FUNCTION fill_relationship_entity_columns()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.head_entity_name IS NULL OR NEW.head_entity_type IS NULL THEN
+        SELECT name, entity_type INTO NEW.head_entity_name, NEW.head_entity_type
+        FROM entities WHERE id = NEW.head_entity_id;
+    END IF;
+
+    IF NEW.tail_entity_name IS NULL OR NEW.tail_entity_type IS NULL THEN
+        SELECT name, entity_type INTO NEW.tail_entity_name, NEW.tail_entity_type
+        FROM entities WHERE id = NEW.tail_entity_id;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER fill_relationships_entity_columns BEFORE INSERT ON relationships
+    FOR EACH ROW EXECUTE FUNCTION fill_relationship_entity_columns();
+
+-- Propagate entity renames and retyping to the copies
+CREATE OR REPLACE FUNCTION sync_relationship_entity_columns()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE relationships
+    SET head_entity_name = NEW.name, head_entity_type = NEW.entity_type
+    WHERE head_entity_id = NEW.id;
+
+    UPDATE relationships
+    SET tail_entity_name = NEW.name, tail_entity_type = NEW.entity_type
+    WHERE tail_entity_id = NEW.id;
+
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER sync_entities_relationship_columns AFTER UPDATE OF name, entity_type ON entities
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.entity_type IS DISTINCT FROM NEW.entity_type)
+    EXECUTE FUNCTION sync_relationship_entity_columns();
+
+-- Entity relationship view reads the copies instead of joining entities twice
+CREATE OR REPLACE VIEW entity_relationships AS
+SELECT
+    r.id,
+    r.uuid,
+    r.head_entity_name,
+    r.head_entity_type,
+    r.relation_type,
+    r.tail_entity_name,
+    r.tail_entity_type,
+    r.confidence,
+    r.source_text,
+    r.created_at
+FROM relationships r;
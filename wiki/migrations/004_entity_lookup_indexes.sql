@@ -0,0 +1,48 @@
+-- Migration 004: Indexes matching the entity and relationship lookups
+-- store_extraction_result resolves entities by (normalized_name, entity_type) and
+-- relationships by (head_entity_id, tail_entity_id, relation_type). A unique covering
+-- index on the entity key turns the existence check into an index-only scan and
+-- gives INSERT ... ON CONFLICT a conflict target.
+
+-- Merge duplicate entities left behind by concurrent writers before enforcing uniqueness,
+-- keeping the oldest row and moving relationships and community memberships onto it
+CREATE TEMP TABLE entity_merges AS
+SELECT id AS duplicate_id, keep_id
+FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY normalized_name, entity_type) AS keep_id
+    FROM entities
+    WHERE normalized_name IS NOT NULL
+) e
+WHERE id <> keep_id;
+
+INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, confidence,
+                           source_chunk_id, source_text, metadata)
+SELECT COALESCE(hm.keep_id, r.head_entity_id),
+       COALESCE(tm.keep_id, r.tail_entity_id),
+       r.relation_type, r.confidence, r.source_chunk_id, r.source_text, r.metadata
+FROM relationships r
+LEFT JOIN entity_merges hm ON hm.duplicate_id = r.head_entity_id
+LEFT JOIN entity_merges tm ON tm.duplicate_id = r.tail_entity_id
+WHERE (hm.keep_id IS NOT NULL OR tm.keep_id IS NOT NULL)
+    AND COALESCE(hm.keep_id, r.head_entity_id) <> COALESCE(tm.keep_id, r.tail_entity_id)
+ON CONFLICT (head_entity_id, tail_entity_id, relation_type) DO NOTHING;
+
+INSERT INTO entity_communities (entity_id, community_id, membership_strength)
+SELECT m.keep_id, ec.community_id, ec.membership_strength
+FROM entity_communities ec
+JOIN entity_merges m ON m.duplicate_id = ec.entity_id
+ON CONFLICT (entity_id, community_id) DO NOTHING;
+
+-- Relationships and memberships still pointing at the duplicates go with them (ON DELETE CASCADE)
+DELETE FROM entities WHERE id IN (SELECT duplicate_id FROM entity_merges);
+
+DROP TABLE entity_merges;
+
+CREATE UNIQUE INDEX idx_entities_normalized_name_type ON entities(normalized_name, entity_type) INCLUDE (id);
+
+-- The composite index leads with normalized_name, so the single-column index is redundant
+DROP INDEX IF EXISTS idx_entities_normalized_name;
+
+-- unique_relationships already indexes (head_entity_id, tail_entity_id, relation_type);
+-- the identical traversal index only doubled the write cost of every relationship insert
+DROP INDEX IF EXISTS idx_relationships_traversal;
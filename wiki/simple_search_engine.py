@@ -1,48 +1,258 @@
 #!/usr/bin/env python3
 """
 Simple file-based search engine implementation.
-Stores documents as files and searches through them using text matching.
+Stores documents as files and answers queries from an inverted index.
+The storage is pluggable: FileBackend keeps the index on disk, DictBackend in memory.
 """
 
 import os
-import json
+import atexit
+import heapq
+import mmap
+import pickle
 import re
+import threading
+import weakref
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable, Optional
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+TOKEN_PATTERN = re.compile(r"\w+")
+TITLE_SEPARATOR = f"\n{'='*50}\n"
+MAX_READ_WORKERS = 32
+MMAP_CACHE_SIZE = 128  # Each cached document holds two mapped files
+SNIPPET_CONTEXT = 100  # Bytes of context on each side of a match
+METADATA_FILE = "metadata.json"
+INVERTED_FILE = "inverted.pkl"
+
+# Engines whose fed documents are written at exit; weak, so unused engines are still collected
+_open_engines = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_engines() -> None:
+    """Write whatever the engines still alive at exit have fed since their last flush."""
+    for engine in list(_open_engines):
+        engine.flush()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def shadow_name(filename: str) -> str:
+    """Name of the lowercased shadow copy stored next to a document file."""
+    return os.path.splitext(filename)[0] + ".lc"
+
+
+class FileBackend:
+    """Stores the index files in a directory on disk."""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.location = str(self.index_dir)
+        # Resolved file paths, built once instead of joined on every lookup
+        self._paths = {}
+
+    def _path(self, name: str) -> Path:
+        path = self._paths.get(name)
+        if path is None:
+            path = self._paths[name] = self.index_dir / name
+        return path
+
+    def exists(self, name: str) -> bool:
+        return self._path(name).exists()
+
+    def read(self, name: str) -> bytes:
+        return self._path(name).read_bytes()
+
+    def write(self, name: str, data: bytes) -> None:
+        """Atomically replace a file, so mappings of the old file stay valid until they are dropped."""
+        path = self._path(name)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def size(self, name: str) -> int:
+        return self._path(name).stat().st_size
+
+    def map(self, name: str) -> mmap.mmap:
+        """Read-only memory map of a file."""
+        with open(self._path(name), 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+
+
+class DictBackend:
+    """Keeps the index files in memory, e.g. for tests or throwaway indexes."""
+
+    location = ":memory:"
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+
+    def exists(self, name: str) -> bool:
+        return name in self.files
+
+    def read(self, name: str) -> bytes:
+        try:
+            return self.files[name]
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    def write(self, name: str, data: bytes) -> None:
+        self.files[name] = bytes(data)
+
+    def delete(self, name: str) -> None:
+        self.files.pop(name, None)
+
+    def size(self, name: str) -> int:
+        return len(self.files[name])
+
+    def map(self, name: str) -> bytes:
+        # bytes already support the slicing and regex search done on mappings
+        return self.read(name)
+
 
 class SimpleSearchEngine:
     """A simple file-based search engine that stores documents and allows text queries."""
     
-    def __init__(self, index_dir: str = "./search_index"):
+    def __init__(self, index_dir: str = "./search_index", backend=None):
         """
         Initialize the search engine with a directory for storing indexed documents.
         
         Args:
             index_dir: Directory path where indexed documents will be stored
+            backend: Storage backend to use instead of a FileBackend on index_dir
         """
-        self.index_dir = Path(index_dir)
-        self.index_dir.mkdir(parents=True, exist_ok=True)
-        self.metadata_file = self.index_dir / "metadata.json"
+        self.backend = backend if backend is not None else FileBackend(index_dir)
+        self._dirty = False
+        # doc_id -> (document map, lowercased shadow map), least recently used first
+        self._mmaps = OrderedDict()
+        self._mmap_lock = threading.Lock()
+        # Guards metadata, the inverted index and _dirty; the indexer feeds from several threads
+        self._index_lock = threading.Lock()
         self._load_metadata()
+        self._load_inverted_index()
+        # feed_document only updates memory; write whatever is left when the process exits
+        _open_engines.add(self)
     
     def _load_metadata(self) -> None:
         """Load or initialize the metadata file that tracks all documents."""
-        if self.metadata_file.exists():
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                self.metadata = json.load(f)
+        if self.backend.exists(METADATA_FILE):
+            self.metadata = orjson.loads(self.backend.read(METADATA_FILE))
         else:
             self.metadata = {}
             self._save_metadata()
     
     def _save_metadata(self) -> None:
         """Save the metadata to disk."""
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+        self.backend.write(METADATA_FILE, orjson.dumps(self.metadata, option=orjson.OPT_INDENT_2))
     
+    def _read_content(self, doc_id: str) -> Optional[str]:
+        """Read back the content a stored document was fed with, or None if its file is missing."""
+        filename = self.metadata[doc_id]['filename']
+        if not self.backend.exists(filename):
+            return None
+        return self.backend.read(filename).decode('utf-8').partition(TITLE_SEPARATOR)[2]
+
+    def _load_inverted_index(self) -> None:
+        """Load the inverted index (term -> {doc_id: term frequency}), rebuilding it if missing."""
+        if self.backend.exists(INVERTED_FILE):
+            self.inverted = pickle.loads(self.backend.read(INVERTED_FILE))
+            return
+
+        self.inverted = defaultdict(Counter)
+        if self.metadata:
+            # Index created before the inverted index existed; tokenize the stored files once
+            for doc_id, doc_meta in self.metadata.items():
+                content = self._read_content(doc_id)
+                if content is None:
+                    logger.warning(f"Document file missing: {doc_meta['filename']}")
+                    continue
+                self._add_postings(doc_id, doc_meta['title'], content)
+            logger.info(f"Rebuilt inverted index for {len(self.metadata)} documents")
+        self._save_inverted_index()
+
+    def _save_inverted_index(self) -> None:
+        """Save the inverted index to disk."""
+        self.backend.write(INVERTED_FILE, pickle.dumps(self.inverted, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _add_postings(self, doc_id: str, title: str, content: str) -> None:
+        """Add the terms of a document to the inverted index."""
+        for token, tf in Counter(tokenize(f"{title} {content}")).items():
+            self.inverted[token][doc_id] = tf
+
+    def _remove_postings(self, doc_id: str) -> None:
+        """Remove a previously indexed document from the inverted index."""
+        content = self._read_content(doc_id)
+        if content is None:
+            return
+        for token in set(tokenize(f"{self.metadata[doc_id]['title']} {content}")):
+            postings = self.inverted.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.inverted[token]
+
+    def flush(self) -> None:
+        """Write the inverted index and metadata to disk if documents were fed since the last flush."""
+        with self._index_lock:
+            if not self._dirty:
+                return
+            # Index first: if the process dies in between, the extra postings point at documents
+            # missing from metadata, which queries skip and feeding them again overwrites
+            self._save_inverted_index()
+            self._save_metadata()
+            self._dirty = False
+
+    def _open_mmaps(self, doc_id: str, filename: str) -> Tuple[mmap.mmap, mmap.mmap]:
+        """Return read-only mappings of a document and its lowercased shadow file, cached LRU."""
+        with self._mmap_lock:
+            maps = self._mmaps.get(doc_id)
+            if maps is not None:
+                self._mmaps.move_to_end(doc_id)
+                return maps
+
+        lc_name = shadow_name(filename)
+        if not self.backend.exists(lc_name):
+            # Document stored before shadow files existed
+            self.backend.write(lc_name, self.backend.read(filename).lower())
+
+        maps = (self.backend.map(filename), self.backend.map(lc_name))
+
+        with self._mmap_lock:
+            self._mmaps[doc_id] = maps
+            # Evicted maps are closed by refcounting once in-flight queries drop them
+            while len(self._mmaps) > MMAP_CACHE_SIZE:
+                self._mmaps.popitem(last=False)
+        return maps
+
+    def clear(self) -> None:
+        """Remove every indexed document and reset the index to empty."""
+        with self._mmap_lock:
+            self._mmaps.clear()
+        with self._index_lock:
+            for doc_meta in self.metadata.values():
+                self.backend.delete(doc_meta['filename'])
+                self.backend.delete(shadow_name(doc_meta['filename']))
+
+            self.metadata = {}
+            self.inverted = defaultdict(Counter)
+            self._save_metadata()
+            self._save_inverted_index()
+            self._dirty = False
+
     def _sanitize_filename(self, doc_id: str) -> str:
         """Convert document ID to a safe filename."""
         # Replace problematic characters with underscores
@@ -53,6 +263,35 @@ class SimpleSearchEngine:
         """
         Index a document by storing it as a file.
         
+        The metadata and inverted index are only written on flush() (or at exit),
+        so feeding N documents doesn't rewrite the whole index N times.
+        
+        Args:
+            doc_id: Unique identifier for the document
+            title: Document title
+            content: Document content/body text
+            metadata: Additional metadata (optional)
+        """
+        self._write_doc(doc_id, title, content, metadata)
+    
+    def feed_documents(self, docs: Iterable[Tuple], flush: bool = True) -> None:
+        """
+        Index a batch of documents and flush the index to disk once.
+        
+        Args:
+            docs: Iterable of (doc_id, title, content[, metadata]) tuples
+            flush: Write the index after the batch; pass False when feeding many
+                batches and call flush() once after the last one
+        """
+        for doc in docs:
+            self.feed_document(*doc)
+        if flush:
+            self.flush()
+    
+    def _write_doc(self, doc_id: str, title: str, content: str, metadata: Dict[str, Any] = None) -> None:
+        """
+        Store a document file and update the in-memory metadata and inverted index.
+        
         Args:
             doc_id: Unique identifier for the document
             title: Document title
@@ -63,26 +302,37 @@ class SimpleSearchEngine:
             raise ValueError("Document ID cannot be empty")
         
         # Create a safe filename
-        safe_filename = self._sanitize_filename(doc_id)
-        doc_path = self.index_dir / f"{safe_filename}.txt"
+        filename = f"{self._sanitize_filename(doc_id)}.txt"
         
         # Combine title and content for the file
-        full_content = f"TITLE: {title}\n{'='*50}\n{content}"
-        
-        # Write document to file
-        with open(doc_path, 'w', encoding='utf-8') as f:
-            f.write(full_content)
+        full_content = f"TITLE: {title}{TITLE_SEPARATOR}{content}"
+        encoded = full_content.encode('utf-8')
         
-        # Update metadata
-        self.metadata[doc_id] = {
-            'filename': f"{safe_filename}.txt",
-            'title': title,
-            'metadata': metadata or {},
-            'content_length': len(content)
-        }
-        self._save_metadata()
+        # The old file is read to drop its postings before it is overwritten, so a document's
+        # files and index entries change together
+        with self._index_lock:
+            # Re-indexing a document replaces its old postings
+            if doc_id in self.metadata:
+                self._remove_postings(doc_id)
+
+            # Write document to file, plus an ASCII-lowercased shadow copy for case-insensitive
+            # byte searches (bytes.lower() keeps every offset aligned with the original)
+            self.backend.write(filename, encoded)
+            self.backend.write(shadow_name(filename), encoded.lower())
+            with self._mmap_lock:
+                self._mmaps.pop(doc_id, None)
+            
+            # Update metadata
+            self.metadata[doc_id] = {
+                'filename': filename,
+                'title': title,
+                'metadata': metadata or {},
+                'content_length': len(content)
+            }
+            self._add_postings(doc_id, title, content)
+            self._dirty = True
         
-        logger.info(f"Indexed document: {title} (ID: {doc_id})")
+        logger.info("Indexed document: %s (ID: %s)", title, doc_id)
     
     def query(self, query_string: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """
@@ -97,72 +347,109 @@ class SimpleSearchEngine:
         """
         if not query_string:
             return []
-        
-        results = []
-        query_lower = query_string.lower()
-        
-        # Search through all indexed documents
-        for doc_id, doc_meta in self.metadata.items():
-            doc_path = self.index_dir / doc_meta['filename']
-            
-            if not doc_path.exists():
-                logger.warning(f"Document file missing: {doc_path}")
-                continue
-            
-            try:
-                with open(doc_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    content_lower = content.lower()
-                    
-                    # Check if query appears in the document
-                    if query_lower in content_lower:
-                        # Find snippet around the first match
-                        match_pos = content_lower.find(query_lower)
-                        snippet_start = max(0, match_pos - 100)
-                        snippet_end = min(len(content), match_pos + len(query_string) + 100)
-                        snippet = content[snippet_start:snippet_end]
-                        
-                        # Clean up snippet
-                        if snippet_start > 0:
-                            snippet = "..." + snippet
-                        if snippet_end < len(content):
-                            snippet = snippet + "..."
-                        
-                        # Count occurrences for relevance
-                        occurrences = content_lower.count(query_lower)
-                        
-                        results.append({
-                            'doc_id': doc_id,
-                            'title': doc_meta['title'],
-                            'snippet': snippet.strip(),
-                            'occurrences': occurrences,
-                            'metadata': doc_meta.get('metadata', {})
-                        })
-                        
-                        if len(results) >= max_results:
-                            break
-                            
-            except Exception as e:
-                logger.error(f"Error reading document {doc_path}: {e}")
-                continue
-        
-        # Sort by relevance (number of occurrences)
-        results.sort(key=lambda x: x['occurrences'], reverse=True)
-        
-        return results[:max_results]
+
+        query_terms = set(tokenize(query_string))
+        if not query_terms:
+            return []
+
+        # Rank under the index lock so concurrent feeds can't mutate the posting lists mid-read
+        with self._index_lock:
+            # Intersect posting lists, starting from the rarest term
+            postings = sorted((self.inverted.get(term, {}) for term in query_terms), key=len)
+            if not postings[0]:
+                return []
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+            # Score by summed term frequency and keep only the top max_results, skipping postings
+            # of documents whose metadata wasn't flushed
+            ranked = heapq.nlargest(
+                max_results,
+                ((doc_id, sum(p[doc_id] for p in postings)) for doc_id in candidates if doc_id in self.metadata),
+                key=itemgetter(1),
+            )
+            hits = [(doc_id, occurrences, self.metadata[doc_id]) for doc_id, occurrences in ranked]
+
+        # One case-insensitive pass finds the snippet anchor: the full query or, failing that, its first term.
+        # Both are lowered with bytes.lower() like the shadow file, which only folds ASCII, and
+        # non-ASCII bytes count as word characters around the term, as \w does in the index
+        first_term = TOKEN_PATTERN.findall(query_string)[0]
+        snippet_pattern = re.compile(
+            re.escape(query_string.encode('utf-8').lower())
+            + rb"|(?<![\w\x80-\xff])" + re.escape(first_term.encode('utf-8').lower()) + rb"(?![\w\x80-\xff])"
+        )
+
+        # Only the ranked documents are read, for their snippets; the reads are blocking IO so overlap them
+        if len(hits) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(hits))) as executor:
+                results = list(executor.map(lambda hit: self._build_result(*hit, snippet_pattern), hits))
+        else:
+            results = [self._build_result(*hit, snippet_pattern) for hit in hits]
+
+        return [result for result in results if result is not None]
+
+    def _build_result(self, doc_id: str, occurrences: int, doc_meta: Dict[str, Any],
+                      snippet_pattern: re.Pattern) -> Optional[Dict[str, Any]]:
+        """Build the search result for a matching document, or None if it can't be read."""
+        filename = doc_meta['filename']
+
+        if not self.backend.exists(filename):
+            logger.warning(f"Document file missing: {filename}")
+            return None
+
+        try:
+            content, content_lower = self._open_mmaps(doc_id, filename)
+        except Exception as e:
+            logger.error(f"Error reading document {filename}: {e}")
+            return None
+
+        # Find snippet around the first match in the shadow file, then cut it from the original
+        match = snippet_pattern.search(content_lower)
+        match_start, match_end = match.span() if match else (0, 0)
+        snippet_start = max(0, match_start - SNIPPET_CONTEXT)
+        snippet_end = min(len(content), match_end + SNIPPET_CONTEXT)
+        snippet = content[snippet_start:snippet_end].decode('utf-8', errors='ignore')
+
+        # Clean up snippet
+        if snippet_start > 0:
+            snippet = "..." + snippet
+        if snippet_end < len(content):
+            snippet = snippet + "..."
+
+        return {
+            'doc_id': doc_id,
+            'title': doc_meta['title'],
+            'snippet': snippet.strip(),
+            'occurrences': occurrences,
+            'metadata': doc_meta.get('metadata', {})
+        }
     
+    def document_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Return the metadata a document was fed with, or None if it is not indexed."""
+        with self._index_lock:
+            doc_meta = self.metadata.get(doc_id)
+            return None if doc_meta is None else doc_meta['metadata']
+
+    def has_document(self, doc_id: str) -> bool:
+        """Return True if a document with this ID is indexed."""
+        with self._index_lock:
+            return doc_id in self.metadata
+
+    def __len__(self) -> int:
+        with self._index_lock:
+            return len(self.metadata)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the search index."""
         total_size = sum(
-            (self.index_dir / meta['filename']).stat().st_size
-            for meta in self.metadata.values()
-            if (self.index_dir / meta['filename']).exists()
+            self.backend.size(doc_meta['filename'])
+            for doc_meta in self.metadata.values()
+            if self.backend.exists(doc_meta['filename'])
         )
         
         return {
             'total_documents': len(self.metadata),
             'index_size_bytes': total_size,
-            'index_directory': str(self.index_dir)
+            'index_directory': self.backend.location
         }
 
 
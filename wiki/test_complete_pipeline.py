@@ -3,30 +3,15 @@
 Test script to verify the complete GLiNER + GLiREL pipeline.
 """
 
-import spacy
-import glirel  # Import for side effects
+from graph_extractor import nlp_model
+from test_gliner_spacy_setup import TEST_LABELS, TEST_THRESHOLD
 
 def test_complete_extraction_pipeline():
     """Test the complete entity and relation extraction pipeline."""
     try:
-        # Create a blank spaCy pipeline
-        nlp = spacy.blank("en")
-
-        # Add GLiNER for entity extraction
-        gliner_config = {
-            "gliner_model": "urchade/gliner_mediumv2.1",
-            "chunk_size": 250,
-            "labels": ["PERSON", "ORGANIZATION", "LOCATION"],
-            "style": "ent",
-            "threshold": 0.75,
-        }
-
-        print("Adding gliner_spacy component...")
-        nlp.add_pipe("gliner_spacy", config=gliner_config)
-
-        # Add GLiREL for relation extraction
-        print("Adding glirel component...")
-        nlp.add_pipe("glirel", after="gliner_spacy")
+        # Reuse the cached GLiNER + GLiREL pipeline instead of building a fresh one
+        print("Loading shared spaCy pipeline with gliner_spacy and glirel...")
+        nlp = nlp_model(TEST_THRESHOLD, TEST_LABELS)
 
         print("\n✓ Pipeline successfully configured!")
         print(f"Components: {nlp.pipe_names}")
@@ -3,25 +3,19 @@
 Test script to verify GLiNER spaCy integration is working correctly.
 """
 
-import spacy
+from graph_extractor import nlp_model
+
+# Same arguments as test_complete_pipeline, so the process-wide nlp_model cache
+# loads the GLiNER model once for both tests
+TEST_LABELS = ("PERSON", "ORGANIZATION", "LOCATION")
+TEST_THRESHOLD = 0.75
+
 
 def test_gliner_spacy_setup():
     """Test that gliner_spacy component can be added to a spaCy pipeline."""
     try:
-        # Create a blank spaCy pipeline
-        nlp = spacy.blank("en")
-        
-        # Add the gliner_spacy component with configuration
-        custom_config = {
-            "gliner_model": "urchade/gliner_mediumv2.1",
-            "chunk_size": 250,
-            "labels": ["PERSON", "ORGANIZATION", "LOCATION"],
-            "style": "ent",
-            "threshold": 0.75,
-        }
-        
-        print("Adding gliner_spacy component to pipeline...")
-        nlp.add_pipe("gliner_spacy", config=custom_config)
+        print("Loading shared spaCy pipeline with gliner_spacy...")
+        nlp = nlp_model(TEST_THRESHOLD, TEST_LABELS)
         
         print("✓ GLiNER spaCy component successfully registered!")
         print(f"Pipeline components: {nlp.pipe_names}")
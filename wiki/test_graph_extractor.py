@@ -7,14 +7,75 @@ import unittest
 import logging
 import logging_config  # Centralized logging configuration
 import os
+import time
 import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, PropertyMock, patch
 
-from graph_extractor import extract_graph_from_document, ExtractionResult
+from graph_extractor import (extract_graph_from_document, extract_graphs_from_documents, ExtractionResult, _load_once,
+                             _pack_sentences, _split_long_sentences)
 from graph_database import GraphDatabase
 
 logger = logging.getLogger(__name__)
 
 
+class TestLoadOnce(unittest.TestCase):
+    """Test cases for the model loader cache."""
+
+    def test_equivalent_calls_share_one_model(self):
+        """Test positional, keyword and defaulted calls for the same arguments load once."""
+        loads = []
+
+        @_load_once
+        def loader(threshold, labels, device="cpu"):
+            loads.append((threshold, labels, device))
+            return object()
+
+        model = loader(0.5, ["PERSON"])
+        self.assertIs(loader(0.5, ["PERSON"], "cpu"), model)
+        self.assertIs(loader(threshold=0.5, labels=("PERSON",)), model)
+        self.assertIsNot(loader(0.5, ["PERSON"], device="cuda"), model)
+        self.assertEqual(len(loads), 2)
+
+
+class TestChunking(unittest.TestCase):
+    """Test cases for token-sized sentence chunking."""
+
+    def test_chunks_stay_within_the_window(self):
+        """Test the overlap is dropped when it and the next sentence don't fit in one chunk."""
+        chunks = list(_pack_sentences(["a", "b", "c"], [3, 2, 5], chunk_size=6, chunk_overlap=2))
+        self.assertEqual(chunks, ["a b", "c"])
+
+    def test_long_sentences_split_on_token_boundaries(self):
+        """Test sentences over the token limit are split into pieces of at most max_tokens."""
+        long_sentence = "one two three four five"
+        offsets = [(0, 3), (4, 7), (8, 13), (14, 18), (19, 23)]
+        pieces, sizes = _split_long_sentences(("short", long_sentence), [1, 5], [[(0, 5)], offsets], max_tokens=2)
+        self.assertEqual(pieces, ["short", "one two", "three four", "five"])
+        self.assertEqual(sizes, [1, 2, 2, 1])
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test cases for pooled connection handling."""
+
+    def test_failed_autocommit_switch_returns_connection(self):
+        """Test a connection that can't switch modes is closed and handed back to the pool."""
+        db = GraphDatabase()
+        pool = MagicMock()
+        conn = pool.getconn.return_value
+        conn.closed = 0
+        conn.close.side_effect = lambda: setattr(conn, 'closed', 1)
+        type(conn).autocommit = PropertyMock(return_value=False,
+                                             side_effect=[False, psycopg2.InterfaceError("connection already closed")])
+
+        with patch.object(db, '_get_pool', return_value=pool):
+            with self.assertRaises(psycopg2.InterfaceError):
+                with db.get_connection(readonly=True):
+                    pass
+
+        pool.putconn.assert_called_once_with(conn, close=True)
+
+
 class TestGraphDatabase(unittest.TestCase):
     """Test cases for graph database functionality."""
 
@@ -69,6 +130,21 @@ class TestGraphDatabase(unittest.TestCase):
         logger.info(f"  Entities: {result.entities}")
         logger.info(f"  Relations: {result.relations}")
 
+    def test_extract_graphs_from_documents_matches_single(self):
+        """Test that batched extraction returns the same results as one document at a time."""
+        documents = [
+            (1, "Test Document", "Albert Einstein was born in Germany and worked at Princeton University."),
+            (2, "Another Document", "Marie Curie studied at the University of Paris."),
+        ]
+
+        results = extract_graphs_from_documents(documents, threshold=0.75)
+
+        self.assertEqual(len(results), len(documents))
+        for (doc_id, title, content), result in zip(documents, results):
+            single = extract_graph_from_document(doc_id, title, content, threshold=0.75)
+            self.assertEqual(result.entities, single.entities)
+            self.assertEqual(result.relations, single.relations)
+
     def test_store_and_retrieve_extraction_result(self):
         """Test storing and retrieving extraction results."""
         # Test connection first
@@ -82,8 +158,8 @@ class TestGraphDatabase(unittest.TestCase):
                 ("Princeton University", "ORGANIZATION")
             ],
             relations=[
-                ("Albert Einstein", "born_in", "Germany"),
-                ("Albert Einstein", "worked_for", "Princeton University")
+                ("Albert Einstein", "PERSON", "born_in", "Germany", "LOCATION"),
+                ("Albert Einstein", "PERSON", "worked_for", "Princeton University", "ORGANIZATION")
             ]
         )
 
@@ -117,3 +193,66 @@ class TestGraphDatabase(unittest.TestCase):
             entity_name = search_results[0]['entity_name']
             neighbors = self.db.get_entity_neighbors(entity_name, max_depth=1)
             logger.info(f"✓ Neighbor search test passed - found {len(neighbors)} neighbors for {entity_name}")
+
+    def test_store_extraction_results_batch(self):
+        """Test storing several documents in one call shares entities across the batch."""
+        if not self.db.test_connection():
+            self.skipTest("Database not available for testing")
+
+        einstein = ExtractionResult(
+            entities=[("Albert Einstein", "PERSON"), ("Germany", "LOCATION")],
+            relations=[("Albert Einstein", "PERSON", "born_in", "Germany", "LOCATION")]
+        )
+        planck = ExtractionResult(
+            entities=[("Max Planck", "PERSON"), ("germany", "LOCATION")],
+            relations=[("Max Planck", "PERSON", "born_in", "germany", "LOCATION")]
+        )
+
+        results = self.db.store_extraction_results([
+            (1, "Einstein Biography", einstein, {"source": "test"}),
+            (2, "Planck Biography", planck, None),
+        ])
+
+        # Germany is only inserted once, by the first document
+        self.assertEqual([r['entities_stored'] for r in results], [2, 1])
+        self.assertEqual([r['relations_stored'] for r in results], [1, 1])
+        self.assertEqual(self.db.get_entity_count(), 3)
+        self.assertEqual(self.db.get_relation_count(), 2)
+
+    def test_store_extraction_results_concurrent_entity(self):
+        """Test relations are stored for an entity a concurrent writer commits mid-statement."""
+        if not self.db.test_connection():
+            self.skipTest("Database not available for testing")
+
+        writer = psycopg2.connect(
+            host=os.getenv('TEST_POSTGRES_HOST', 'localhost'),
+            port=int(os.getenv('TEST_POSTGRES_PORT', '5432')),
+            dbname=os.getenv('TEST_POSTGRES_DB', 'wiki_test'),
+            user=os.getenv('TEST_POSTGRES_USER', 'postgres'),
+            password=os.getenv('TEST_POSTGRES_PASSWORD', '')
+        )
+        self.addCleanup(writer.close)
+        with writer.cursor() as cur:
+            cur.execute("INSERT INTO entities (name, entity_type, normalized_name) VALUES ('Germany', 'LOCATION', 'germany')")
+
+        result = ExtractionResult(
+            entities=[("Albert Einstein", "PERSON"), ("Germany", "LOCATION")],
+            relations=[("Albert Einstein", "PERSON", "born_in", "Germany", "LOCATION")]
+        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.db.store_extraction_results, [(1, "Einstein Biography", result, None)])
+            # Commit once the store is blocked on the uncommitted conflicting row
+            with self.db.get_connection() as conn:
+                with conn.cursor() as cur:
+                    for _ in range(100):
+                        cur.execute("SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'")
+                        if cur.fetchone()[0]:
+                            break
+                        time.sleep(0.05)
+            writer.commit()
+            [stored] = future.result(timeout=10)
+
+        self.assertEqual(stored['entities_stored'], 1)
+        self.assertEqual(stored['relations_stored'], 1)
+        self.assertEqual(self.db.get_entity_count(), 2)
+        self.assertEqual(self.db.get_relation_count(), 1)
@@ -2,11 +2,17 @@
 """
 Unit tests for PostgreSQL graph schema and functions.
 Tests the graph tables, indexes, and SQL functions for GraphRAG implementation.
+
+Each pytest-xdist worker builds its own template and test database, so the suite
+can run in parallel with `pytest -n auto --dist loadscope`.
 """
 
 import unittest
+import csv
+import io
 import psycopg2
-import psycopg2.extras
+from psycopg2 import sql
+from psycopg2.extras import execute_values
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import tempfile
 import os
@@ -14,12 +20,50 @@ from unittest.mock import patch, MagicMock
 import json
 
 
+MIGRATION_FILES = [
+    '/home/oskari/git/wiki/migrations/001_create_graph_tables.sql',
+    '/home/oskari/git/wiki/migrations/002_create_graph_functions.sql',
+    '/home/oskari/git/wiki/migrations/003_denormalize_relationship_entities.sql',
+    '/home/oskari/git/wiki/migrations/004_entity_lookup_indexes.sql'
+]
+
+# Extensions scripts/setup_database.sh enables before the migrations run
+EXTENSIONS_SQL = """
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+CREATE EXTENSION IF NOT EXISTS "vector";
+"""
+
+EXPECTED_TABLES = frozenset({
+    'entities', 'relationships', 'communities',
+    'entity_communities', 'graph_statistics'
+})
+
+# Some key indexes
+EXPECTED_INDEXES = frozenset({
+    'idx_entities_name',
+    'idx_entities_type',
+    'idx_entities_normalized_name_type',
+    'idx_relationships_head_entity',
+    'idx_relationships_tail_entity',
+    'idx_communities_size'
+})
+
+
+def bulk_insert_entities(cursor, rows):
+    """Load (name, entity_type) rows into entities with one COPY instead of INSERTs."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert("COPY entities (name, entity_type) FROM STDIN WITH (FORMAT CSV)", buffer)
+
+
 class TestGraphSchema(unittest.TestCase):
     """Test cases for the graph database schema and functions."""
 
     @classmethod
     def setUpClass(cls):
-        """Set up test database connection."""
+        """Build a migrated template database and copy the class's test database from it."""
         # Use environment variables or defaults for test database
         cls.db_config = {
             'host': os.getenv('TEST_DB_HOST', 'localhost'),
@@ -28,78 +72,127 @@ class TestGraphSchema(unittest.TestCase):
             'password': os.getenv('TEST_DB_PASSWORD', 'postgres'),
             'database': os.getenv('TEST_DB_NAME', 'wiki_test')
         }
+        # Databases are per xdist worker, so parallel workers never share or drop each other's
+        worker = os.getenv('PYTEST_XDIST_WORKER', 'gw0')
+        cls.template_database = f"{cls.db_config['database']}_{worker}_template"
+        cls.test_database = f"{cls.db_config['database']}_{worker}"
+
+        # Read the migration files once for the whole class
+        cls._migrations = []
+        for migration_file in MIGRATION_FILES:
+            if os.path.exists(migration_file):
+                with open(migration_file, 'r') as f:
+                    cls._migrations.append((migration_file, f.read()))
 
-        # Create test database if it doesn't exist
+        # Admin connection for creating and dropping databases, kept for the whole class.
+        # Without a server, skip the class once instead of failing every test on connect
+        try:
+            cls.admin_conn = psycopg2.connect(**{**cls.db_config, 'database': 'postgres'}, connect_timeout=5)
+        except psycopg2.OperationalError as e:
+            raise unittest.SkipTest(f"PostgreSQL unavailable: {e}")
+        cls.admin_conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+
+        # Run the migrations once, against a fresh template database
+        cls._drop_template()
+        with cls.admin_conn.cursor() as cur:
+            cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(cls.template_database)))
+
+        conn = psycopg2.connect(**{**cls.db_config, 'database': cls.template_database})
+        conn.autocommit = True
         try:
-            conn = psycopg2.connect(
-                host=cls.db_config['host'],
-                port=cls.db_config['port'],
-                user=cls.db_config['user'],
-                password=cls.db_config['password'],
-                database='postgres'
-            )
-            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-
             with conn.cursor() as cur:
-                cur.execute(f"SELECT 1 FROM pg_database WHERE datname = '{cls.db_config['database']}'")
-                if not cur.fetchone():
-                    cur.execute(f"CREATE DATABASE {cls.db_config['database']}")
-
+                cur.execute(EXTENSIONS_SQL)
+                cls._apply_migrations(cur)
+        finally:
             conn.close()
-        except Exception as e:
-            print(f"Warning: Could not create test database: {e}")
+
+        # Copying the template is a file-level copy in PostgreSQL, no DDL is replayed
+        with cls.admin_conn.cursor() as cur:
+            template, test_database = sql.Identifier(cls.template_database), sql.Identifier(cls.test_database)
+            cur.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE TRUE").format(template))
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(test_database))
+            cur.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(test_database, template))
+
+        # One connection for the whole class; tests only open cursors on it
+        cls.conn = psycopg2.connect(**{**cls.db_config, 'database': cls.test_database})
+        cls.conn.autocommit = False
+
+        # The schema is fixed for the class, so read the catalogs once in a single round trip
+        with cls.conn.cursor() as cur:
+            cur.execute("""
+                SELECT 'table', table_name FROM information_schema.tables
+                WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+                UNION ALL
+                SELECT 'index', indexname FROM pg_indexes
+                WHERE tablename IN ('entities', 'relationships', 'communities')
+            """)
+            catalog = cur.fetchall()
+        cls.conn.rollback()
+        cls._tables = frozenset(name for kind, name in catalog if kind == 'table')
+        cls._indexes = frozenset(name for kind, name in catalog if kind == 'index')
+
+    @classmethod
+    def tearDownClass(cls):
+        """Drop the test and template databases and close the connections."""
+        cls.conn.close()
+        with cls.admin_conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(cls.test_database)))
+        cls._drop_template()
+        cls.admin_conn.close()
+
+    @classmethod
+    def _drop_template(cls):
+        """Drop the template database if a previous run left it behind."""
+        with cls.admin_conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (cls.template_database,))
+            if cur.fetchone():
+                template = sql.Identifier(cls.template_database)
+                cur.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE FALSE").format(template))
+                cur.execute(sql.SQL("DROP DATABASE {}").format(template))
 
     def setUp(self):
         """Set up test environment before each test."""
-        self.conn = psycopg2.connect(**self.db_config)
-        self.conn.autocommit = True
-        self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        # Apply migrations
-        self._apply_migrations()
+        # Each test runs in one transaction that tearDown rolls back, so nothing is ever persisted.
+        # Plain tuple rows: tests read one or two columns and unpack them positionally
+        self.cursor = self.conn.cursor()
 
     def tearDown(self):
         """Clean up test environment after each test."""
-        if hasattr(self, 'cursor') and self.cursor:
-            # Clean up test data
-            self.cursor.execute("TRUNCATE TABLE entity_communities, relationships, entities, communities, graph_statistics CASCADE")
-            self.cursor.close()
-
-        if hasattr(self, 'conn') and self.conn:
-            self.conn.close()
+        self.cursor.close()
+        self.conn.rollback()
 
-    def _apply_migrations(self):
+    @classmethod
+    def _apply_migrations(cls, cursor):
         """Apply database migrations for testing."""
-        migration_files = [
-            '/home/oskari/git/wiki/migrations/001_create_graph_tables.sql',
-            '/home/oskari/git/wiki/migrations/002_create_graph_functions.sql'
-        ]
-
-        for migration_file in migration_files:
-            if os.path.exists(migration_file):
-                with open(migration_file, 'r') as f:
-                    migration_sql = f.read()
-                try:
-                    self.cursor.execute(migration_sql)
-                except Exception as e:
-                    print(f"Migration error in {migration_file}: {e}")
-
-    def test_table_creation(self):
-        """Test that all required tables are created."""
-        expected_tables = [
-            'entities', 'relationships', 'communities',
-            'entity_communities', 'graph_statistics'
-        ]
-
+        for migration_file, migration_sql in cls._migrations:
+            try:
+                cursor.execute(migration_sql)
+            except Exception as e:
+                print(f"Migration error in {migration_file}: {e}")
+
+    def _create_chain_graph(self):
+        """Create the graph A -> B -> C in one round trip and return {name: id}."""
         self.cursor.execute("""
-            SELECT table_name FROM information_schema.tables
-            WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+            WITH new_entities AS (
+                INSERT INTO entities (name, entity_type)
+                VALUES ('A', 'PERSON'), ('B', 'PERSON'), ('C', 'PERSON')
+                RETURNING id, name
+            ), new_relationships AS (
+                INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, confidence)
+                SELECT head.id, tail.id, 'knows', edge.confidence
+                FROM (VALUES ('A', 'B', 0.9), ('B', 'C', 0.8)) AS edge(head_name, tail_name, confidence)
+                JOIN new_entities head ON head.name = edge.head_name
+                JOIN new_entities tail ON tail.name = edge.tail_name
+            )
+            SELECT id, name FROM new_entities
         """)
 
-        actual_tables = [row['table_name'] for row in self.cursor.fetchall()]
+        return {name: entity_id for entity_id, name in self.cursor.fetchall()}
 
-        for table in expected_tables:
-            self.assertIn(table, actual_tables, f"Table {table} not found")
+    def test_table_creation(self):
+        """Test that all required tables are created."""
+        self.assertLessEqual(EXPECTED_TABLES, self._tables,
+                             f"Tables not found: {sorted(EXPECTED_TABLES - self._tables)}")
 
     def test_entity_insertion(self):
         """Test entity insertion and retrieval."""
@@ -112,15 +205,14 @@ class TestGraphSchema(unittest.TestCase):
 
         result = self.cursor.fetchone()
         self.assertIsNotNone(result)
-        self.assertEqual(result['name'], "Test Entity")
-        self.assertEqual(result['entity_type'], "PERSON")
-        self.assertEqual(result['confidence'], 0.95)
+        entity_id, _, name, entity_type, confidence = result
+        self.assertEqual(name, "Test Entity")
+        self.assertEqual(entity_type, "PERSON")
+        self.assertEqual(confidence, 0.95)
 
         # Test retrieval
-        entity_id = result['id']
-        self.cursor.execute("SELECT * FROM entities WHERE id = %s", (entity_id,))
-        retrieved = self.cursor.fetchone()
-        self.assertEqual(retrieved['name'], "Test Entity")
+        self.cursor.execute("SELECT name FROM entities WHERE id = %s", (entity_id,))
+        self.assertEqual(self.cursor.fetchone()[0], "Test Entity")
 
     def test_relationship_insertion(self):
         """Test relationship insertion with foreign key constraints."""
@@ -131,7 +223,7 @@ class TestGraphSchema(unittest.TestCase):
             RETURNING id
         """)
 
-        entity_ids = [row['id'] for row in self.cursor.fetchall()]
+        entity_ids = [row[0] for row in self.cursor.fetchall()]
         self.assertEqual(len(entity_ids), 2)
 
         # Insert relationship
@@ -143,7 +235,7 @@ class TestGraphSchema(unittest.TestCase):
 
         result = self.cursor.fetchone()
         self.assertIsNotNone(result)
-        self.assertEqual(result['relation_type'], "works_for")
+        self.assertEqual(result[1], "works_for")
 
     def test_relationship_constraints(self):
         """Test relationship constraints (no self-relationships, unique constraints)."""
@@ -152,7 +244,7 @@ class TestGraphSchema(unittest.TestCase):
             INSERT INTO entities (name, entity_type) VALUES ('Test Entity', 'PERSON')
             RETURNING id
         """)
-        entity_id = self.cursor.fetchone()['id']
+        entity_id = self.cursor.fetchone()[0]
 
         # Test self-relationship prevention
         with self.assertRaises(psycopg2.IntegrityError):
@@ -164,6 +256,19 @@ class TestGraphSchema(unittest.TestCase):
         # Reset connection after integrity error
         self.conn.rollback()
 
+    def test_entity_unique_constraint(self):
+        """Test that (normalized_name, entity_type) is unique."""
+        self.cursor.execute("""
+            INSERT INTO entities (name, entity_type, normalized_name)
+            VALUES ('Paris', 'LOCATION', 'paris'), ('Paris', 'PERSON', 'paris')
+        """)
+
+        with self.assertRaises(psycopg2.IntegrityError):
+            self.cursor.execute("""
+                INSERT INTO entities (name, entity_type, normalized_name)
+                VALUES ('PARIS', 'LOCATION', 'paris')
+            """)
+
     def test_community_creation(self):
         """Test community creation and entity assignment."""
         # Create community
@@ -175,7 +280,8 @@ class TestGraphSchema(unittest.TestCase):
 
         community = self.cursor.fetchone()
         self.assertIsNotNone(community)
-        self.assertEqual(community['name'], "Test Community")
+        community_id, community_name = community
+        self.assertEqual(community_name, "Test Community")
 
         # Create entities
         self.cursor.execute("""
@@ -183,22 +289,21 @@ class TestGraphSchema(unittest.TestCase):
             VALUES ('Entity 1', 'PERSON'), ('Entity 2', 'PERSON')
             RETURNING id
         """)
-        entity_ids = [row['id'] for row in self.cursor.fetchall()]
+        entity_ids = [row[0] for row in self.cursor.fetchall()]
 
         # Assign entities to community
-        for entity_id in entity_ids:
-            self.cursor.execute("""
-                INSERT INTO entity_communities (entity_id, community_id, membership_strength)
-                VALUES (%s, %s, %s)
-            """, (entity_id, community['id'], 1.0))
+        execute_values(self.cursor, """
+            INSERT INTO entity_communities (entity_id, community_id, membership_strength)
+            VALUES %s
+        """, [(entity_id, community_id, 1.0) for entity_id in entity_ids])
 
         # Verify assignments
         self.cursor.execute("""
-            SELECT COUNT(*) as count FROM entity_communities
+            SELECT COUNT(*) FROM entity_communities
             WHERE community_id = %s
-        """, (community['id'],))
+        """, (community_id,))
 
-        count = self.cursor.fetchone()['count']
+        count = self.cursor.fetchone()[0]
         self.assertEqual(count, 2)
 
     def test_entity_relationships_view(self):
@@ -209,7 +314,7 @@ class TestGraphSchema(unittest.TestCase):
             VALUES ('Alice', 'PERSON'), ('Acme Corp', 'ORGANIZATION')
             RETURNING id
         """)
-        entity_ids = [row['id'] for row in self.cursor.fetchall()]
+        entity_ids = [row[0] for row in self.cursor.fetchall()]
 
         self.cursor.execute("""
             INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, confidence)
@@ -218,75 +323,59 @@ class TestGraphSchema(unittest.TestCase):
 
         # Query the view
         self.cursor.execute("""
-            SELECT * FROM entity_relationships
+            SELECT head_entity_name, tail_entity_name, relation_type FROM entity_relationships
             WHERE head_entity_name = 'Alice' AND tail_entity_name = 'Acme Corp'
         """)
 
         result = self.cursor.fetchone()
         self.assertIsNotNone(result)
-        self.assertEqual(result['head_entity_name'], 'Alice')
-        self.assertEqual(result['tail_entity_name'], 'Acme Corp')
-        self.assertEqual(result['relation_type'], 'employed_by')
+        self.assertEqual(result, ('Alice', 'Acme Corp', 'employed_by'))
 
-    def test_get_entity_neighbors_function(self):
-        """Test the get_entity_neighbors SQL function."""
-        # Create test graph: A -> B -> C
+    def test_relationship_entity_columns(self):
+        """Test that entity names and types are copied onto relationships and kept in sync."""
         self.cursor.execute("""
             INSERT INTO entities (name, entity_type)
-            VALUES ('A', 'PERSON'), ('B', 'PERSON'), ('C', 'PERSON')
-            RETURNING id, name
+            VALUES ('Alice', 'PERSON'), ('Acme Corp', 'ORGANIZATION')
+            RETURNING id
         """)
+        entity_ids = [row[0] for row in self.cursor.fetchall()]
 
-        entities = {row['name']: row['id'] for row in self.cursor.fetchall()}
-
-        # Create relationships
         self.cursor.execute("""
-            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, confidence)
-            VALUES
-                (%s, %s, 'knows', 0.9),
-                (%s, %s, 'knows', 0.8)
-        """, (entities['A'], entities['B'], entities['B'], entities['C']))
+            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type)
+            VALUES (%s, %s, 'employed_by')
+            RETURNING id, head_entity_name, head_entity_type, tail_entity_name, tail_entity_type
+        """, (entity_ids[0], entity_ids[1]))
 
-        # Test direct neighbors (depth 1)
-        self.cursor.execute("""
-            SELECT neighbor_name, depth FROM get_entity_neighbors(%s, 1)
-            ORDER BY neighbor_name
-        """, (entities['A'],))
+        relationship_id, *entity_columns = self.cursor.fetchone()
+        self.assertEqual(entity_columns, ['Alice', 'PERSON', 'Acme Corp', 'ORGANIZATION'])
 
-        neighbors = self.cursor.fetchall()
-        self.assertEqual(len(neighbors), 1)
-        self.assertEqual(neighbors[0]['neighbor_name'], 'B')
-        self.assertEqual(neighbors[0]['depth'], 1)
+        # Renaming an entity updates the copies
+        self.cursor.execute("UPDATE entities SET name = 'Acme Inc' WHERE id = %s", (entity_ids[1],))
+        self.cursor.execute("SELECT tail_entity_name FROM relationships WHERE id = %s", (relationship_id,))
+        self.assertEqual(self.cursor.fetchone()[0], 'Acme Inc')
 
-        # Test extended neighbors (depth 2)
+    def test_get_entity_neighbors_function(self):
+        """Test the get_entity_neighbors SQL function."""
+        # Create test graph: A -> B -> C
+        entities = self._create_chain_graph()
+
+        # One depth-2 traversal covers both checks; direct neighbors are its depth-1 rows
         self.cursor.execute("""
             SELECT neighbor_name, depth FROM get_entity_neighbors(%s, 2)
             ORDER BY neighbor_name, depth
         """, (entities['A'],))
 
         neighbors = self.cursor.fetchall()
-        neighbor_names = [n['neighbor_name'] for n in neighbors]
+        self.assertEqual([n for n in neighbors if n[1] == 1], [('B', 1)])
+
+        neighbor_names = [name for name, _ in neighbors]
         self.assertIn('B', neighbor_names)
         self.assertIn('C', neighbor_names)
 
     def test_find_entity_path_function(self):
         """Test the find_entity_path SQL function."""
-        # Create test graph: A -> B -> C
-        self.cursor.execute("""
-            INSERT INTO entities (name, entity_type)
-            VALUES ('A', 'PERSON'), ('B', 'PERSON'), ('C', 'PERSON')
-            RETURNING id, name
-        """)
-
-        entities = {row['name']: row['id'] for row in self.cursor.fetchall()}
-
         # Create path A -> B -> C
-        self.cursor.execute("""
-            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type, confidence)
-            VALUES
-                (%s, %s, 'knows', 0.9),
-                (%s, %s, 'knows', 0.8)
-        """, (entities['A'], entities['B'], entities['B'], entities['C']))
+        entities = self._create_chain_graph()
 
         # Find path from A to C
         self.cursor.execute("""
@@ -295,10 +384,11 @@ class TestGraphSchema(unittest.TestCase):
 
         result = self.cursor.fetchone()
         self.assertIsNotNone(result)
-        self.assertEqual(result['path_length'], 2)
-        self.assertEqual(len(result['entity_path']), 3)  # A, B, C
-        self.assertEqual(result['entity_path'][0], entities['A'])
-        self.assertEqual(result['entity_path'][-1], entities['C'])
+        path_length, entity_path = result
+        self.assertEqual(path_length, 2)
+        self.assertEqual(len(entity_path), 3)  # A, B, C
+        self.assertEqual(entity_path[0], entities['A'])
+        self.assertEqual(entity_path[-1], entities['C'])
 
     def test_find_entities_by_name_function(self):
         """Test the find_entities_by_name function with similarity search."""
@@ -310,10 +400,7 @@ class TestGraphSchema(unittest.TestCase):
             ("Johnny Walker", "PERSON")
         ]
 
-        for name, entity_type in test_entities:
-            self.cursor.execute("""
-                INSERT INTO entities (name, entity_type) VALUES (%s, %s)
-            """, (name, entity_type))
+        bulk_insert_entities(self.cursor, test_entities)
 
         # Search for "John"
         self.cursor.execute("""
@@ -326,32 +413,18 @@ class TestGraphSchema(unittest.TestCase):
         self.assertGreater(len(results), 0)
 
         # Results should include entities with "John" in the name
-        names = [r['entity_name'] for r in results]
+        names = [name for name, _ in results]
         self.assertIn("John Smith", names)
         self.assertIn("John Doe", names)
 
     def test_compute_graph_statistics_function(self):
         """Test the compute_graph_statistics function."""
-        # Create test entities and relationships
-        self.cursor.execute("""
-            INSERT INTO entities (name, entity_type)
-            VALUES ('A', 'PERSON'), ('B', 'PERSON'), ('C', 'PERSON')
-            RETURNING id
-        """)
-
-        entity_ids = [row['id'] for row in self.cursor.fetchall()]
-
-        # Create relationships
-        self.cursor.execute("""
-            INSERT INTO relationships (head_entity_id, tail_entity_id, relation_type)
-            VALUES (%s, %s, 'knows'), (%s, %s, 'knows')
-        """, (entity_ids[0], entity_ids[1], entity_ids[1], entity_ids[2]))
+        # Create test entities and relationships: A -> B -> C
+        self._create_chain_graph()
 
         # Compute statistics
-        self.cursor.execute("SELECT compute_graph_statistics() as stats")
-        result = self.cursor.fetchone()
-
-        stats = result['stats']
+        self.cursor.execute("SELECT compute_graph_statistics()")
+        stats = self.cursor.fetchone()[0]
         self.assertIsInstance(stats, dict)
         self.assertEqual(stats['entity_count'], 3)
         self.assertEqual(stats['relationship_count'], 2)
@@ -366,21 +439,20 @@ class TestGraphSchema(unittest.TestCase):
             VALUES ('Test Community', 'A test community', 2)
             RETURNING id
         """)
-        community_id = self.cursor.fetchone()['id']
+        community_id = self.cursor.fetchone()[0]
 
         self.cursor.execute("""
             INSERT INTO entities (name, entity_type)
             VALUES ('Alice', 'PERSON'), ('Bob', 'PERSON')
             RETURNING id
         """)
-        entity_ids = [row['id'] for row in self.cursor.fetchall()]
+        entity_ids = [row[0] for row in self.cursor.fetchall()]
 
         # Assign entities to community
-        for entity_id in entity_ids:
-            self.cursor.execute("""
-                INSERT INTO entity_communities (entity_id, community_id)
-                VALUES (%s, %s)
-            """, (entity_id, community_id))
+        execute_values(self.cursor, """
+            INSERT INTO entity_communities (entity_id, community_id)
+            VALUES %s
+        """, [(entity_id, community_id) for entity_id in entity_ids])
 
         # Create relationship
         self.cursor.execute("""
@@ -390,59 +462,37 @@ class TestGraphSchema(unittest.TestCase):
 
         # Get community context
         self.cursor.execute("""
-            SELECT * FROM get_community_context(%s)
+            SELECT community_name, entity_count FROM get_community_context(%s)
         """, (entity_ids,))
 
         result = self.cursor.fetchone()
         self.assertIsNotNone(result)
-        self.assertEqual(result['community_name'], 'Test Community')
-        self.assertEqual(result['entity_count'], 2)
+        self.assertEqual(result, ('Test Community', 2))
 
     def test_indexes_exist(self):
         """Test that required indexes are created."""
-        self.cursor.execute("""
-            SELECT indexname FROM pg_indexes
-            WHERE tablename IN ('entities', 'relationships', 'communities')
-        """)
-
-        indexes = [row['indexname'] for row in self.cursor.fetchall()]
-
-        # Check for some key indexes
-        expected_indexes = [
-            'idx_entities_name',
-            'idx_entities_type',
-            'idx_relationships_head_entity',
-            'idx_relationships_tail_entity',
-            'idx_communities_size'
-        ]
-
-        for index in expected_indexes:
-            self.assertIn(index, indexes, f"Index {index} not found")
+        self.assertLessEqual(EXPECTED_INDEXES, self._indexes,
+                             f"Indexes not found: {sorted(EXPECTED_INDEXES - self._indexes)}")
 
     def test_triggers_work(self):
         """Test that updated_at triggers work correctly."""
-        # Insert entity
+        # Insert entity, backdated because NOW() is fixed for the whole test transaction
         self.cursor.execute("""
-            INSERT INTO entities (name, entity_type)
-            VALUES ('Test Entity', 'PERSON')
-            RETURNING id, created_at, updated_at
+            INSERT INTO entities (name, entity_type, updated_at)
+            VALUES ('Test Entity', 'PERSON', NOW() - INTERVAL '1 minute')
+            RETURNING id, updated_at
         """)
 
-        original = self.cursor.fetchone()
-        entity_id = original['id']
-        original_updated_at = original['updated_at']
+        entity_id, original_updated_at = self.cursor.fetchone()
 
         # Update entity
-        import time
-        time.sleep(0.1)  # Ensure timestamp difference
-
         self.cursor.execute("""
             UPDATE entities SET name = 'Updated Entity' WHERE id = %s
             RETURNING updated_at
         """, (entity_id,))
 
-        updated = self.cursor.fetchone()
-        self.assertGreater(updated['updated_at'], original_updated_at)
+        updated_at = self.cursor.fetchone()[0]
+        self.assertGreater(updated_at, original_updated_at)
 
 
 if __name__ == '__main__':
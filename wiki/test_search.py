@@ -1,39 +1,27 @@
 #!/usr/bin/env python3
 """
 Test script to query the indexed Wikipedia documents.
+
+Pass a query to run it once, or no query to load the index once and
+search it interactively.
 """
 
-import sys
+import argparse
 from simple_search_engine import SimpleSearchEngine
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python test_search.py <query>")
-        print("Example: python test_search.py anarchism")
-        sys.exit(1)
-    
-    query = " ".join(sys.argv[1:])
-    
-    # Initialize search engine with the same index directory
-    engine = SimpleSearchEngine(index_dir="./wikipedia_index")
-    
-    # Get index stats
-    stats = engine.get_stats()
-    print(f"Search index contains {stats['total_documents']} documents")
-    print(f"Total index size: {stats['index_size_bytes'] / 1024 / 1024:.2f} MB")
-    print()
-    
-    # Perform search
+
+def print_results(engine, query, max_results):
+    """Run one query against an already loaded engine and print the results."""
     print(f"Searching for: '{query}'")
     print("-" * 50)
-    
-    results = engine.query(query, max_results=5)
-    
+
+    results = engine.query(query, max_results=max_results)
+
     if not results:
         print("No results found.")
     else:
         print(f"Found {len(results)} results:\n")
-        
+
         for i, result in enumerate(results, 1):
             print(f"{i}. {result['title']}")
             print(f"   Occurrences: {result['occurrences']}")
@@ -42,5 +30,52 @@ def main():
                 print(f"   URL: {result['metadata'].get('url', 'N/A')}")
             print()
 
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query the indexed Wikipedia documents",
+        epilog="Example: python test_search.py anarchism"
+    )
+    parser.add_argument(
+        "query",
+        nargs="*",
+        help="Search query; omit it to start an interactive prompt"
+    )
+    parser.add_argument(
+        "--index-dir",
+        default="./wikipedia_index",
+        help="Search index directory (default: ./wikipedia_index)"
+    )
+    parser.add_argument(
+        "-k", "--max-results",
+        type=int,
+        default=5,
+        help="Maximum number of results per query (default: 5)"
+    )
+    args = parser.parse_args()
+
+    # Load the index once; interactive queries all reuse this engine
+    engine = SimpleSearchEngine(index_dir=args.index_dir)
+
+    # Get index stats
+    stats = engine.get_stats()
+    print(f"Search index contains {stats['total_documents']} documents")
+    print(f"Total index size: {stats['index_size_bytes'] / 1024 / 1024:.2f} MB")
+    print()
+
+    if args.query:
+        print_results(engine, " ".join(args.query), args.max_results)
+        return
+
+    print("Enter a query per line (Ctrl-D to quit)")
+    while True:
+        try:
+            query = input("> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if query:
+            print_results(engine, query, args.max_results)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
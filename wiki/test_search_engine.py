@@ -3,35 +3,56 @@
 Unit tests for SimpleSearchEngine and wikipedia indexer functionality.
 """
 
+import gc
+import os
+import sys
+import weakref
 import unittest
 import tempfile
 import shutil
 import json
 from pathlib import Path
 from unittest.mock import patch, MagicMock
-from simple_search_engine import SimpleSearchEngine
-from wikipedia_indexer import index_document, search_engine
+from concurrent.futures import ThreadPoolExecutor
+from simple_search_engine import SimpleSearchEngine, DictBackend, METADATA_FILE, INVERTED_FILE, shadow_name, _flush_open_engines
+from wikipedia_indexer import index_document, get_search_engine
+
+# RAM-backed scratch space for the one test that exercises the on-disk backend
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
 
 
 class TestSimpleSearchEngine(unittest.TestCase):
     """Test cases for the SimpleSearchEngine class."""
     
     def setUp(self):
-        """Set up test environment before each test."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.engine = SimpleSearchEngine(index_dir=self.temp_dir)
-    
-    def tearDown(self):
-        """Clean up test environment after each test."""
-        shutil.rmtree(self.temp_dir)
+        """Set up an engine on an in-memory backend, so no test touches the filesystem."""
+        self.backend = DictBackend()
+        self.engine = SimpleSearchEngine(backend=self.backend)
     
     def test_initialization(self):
         """Test search engine initialization."""
-        self.assertTrue(Path(self.temp_dir).exists())
-        self.assertEqual(self.engine.index_dir, Path(self.temp_dir))
-        self.assertTrue(self.engine.metadata_file.exists())
+        self.assertTrue(self.backend.exists(METADATA_FILE))
         self.assertEqual(self.engine.metadata, {})
     
+    def test_file_backend(self):
+        """Test the default backend stores the index on disk and answers queries from it."""
+        temp_dir = tempfile.mkdtemp(dir=SCRATCH_DIR)
+        try:
+            engine = SimpleSearchEngine(index_dir=temp_dir)
+            engine.feed_document("doc1", "Python Programming", "Python is a programming language.")
+            engine.flush()
+            
+            self.assertTrue((Path(temp_dir) / METADATA_FILE).exists())
+            self.assertTrue((Path(temp_dir) / "doc1.txt").exists())
+            self.assertEqual(engine.get_stats()['index_directory'], temp_dir)
+            
+            reloaded = SimpleSearchEngine(index_dir=temp_dir)
+            results = reloaded.query("python")
+            self.assertEqual(len(results), 1)
+            self.assertIn("Python is a programming language.", results[0]['snippet'])
+        finally:
+            shutil.rmtree(temp_dir)
+    
     def test_sanitize_filename(self):
         """Test filename sanitization."""
         test_cases = [
@@ -63,14 +84,12 @@ class TestSimpleSearchEngine(unittest.TestCase):
         self.assertEqual(doc_meta['content_length'], len(content))
         
         # Check document file was created
-        doc_path = self.engine.index_dir / doc_meta['filename']
-        self.assertTrue(doc_path.exists())
+        self.assertTrue(self.backend.exists(doc_meta['filename']))
         
         # Check file content
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            file_content = f.read()
-            self.assertIn(title, file_content)
-            self.assertIn(content, file_content)
+        file_content = self.backend.read(doc_meta['filename']).decode('utf-8')
+        self.assertIn(title, file_content)
+        self.assertIn(content, file_content)
     
     def test_feed_document_empty_id(self):
         """Test feeding document with empty ID raises error."""
@@ -112,6 +131,26 @@ class TestSimpleSearchEngine(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertIn("PYTHON", results[0]['snippet'])
     
+    def test_snippet_anchors_non_ascii_query(self):
+        """Test queries with non-ASCII capitals anchor the snippet at their match."""
+        filler = "Unrelated opening text. " * 20
+        self.engine.feed_document("doc1", "Countries", filler + "Die Republik Österreich liegt in Europa.")
+        
+        for query in ("Österreich", "Republik Österreich"):
+            self.assertIn("Österreich", self.engine.query(query)[0]['snippet'])
+    
+    def test_lowercase_shadow_written_at_feed_time(self):
+        """Test the lowercased copy is stored once when feeding, not rebuilt per query."""
+        self.engine.feed_document("doc1", "Mixed Case", "Contains PYTHON and Python.")
+        filename = self.engine.metadata["doc1"]['filename']
+        shadow = self.backend.read(shadow_name(filename))
+        self.assertEqual(shadow, self.backend.read(filename).lower())
+
+        with patch.object(self.backend, 'write') as mock_write:
+            for _ in range(3):
+                self.assertEqual(len(self.engine.query("python")), 1)
+        mock_write.assert_not_called()
+
     def test_query_relevance_sorting(self):
         """Test results are sorted by relevance (occurrence count)."""
         self.engine.feed_document("doc1", "Single Mention", 
@@ -136,6 +175,140 @@ class TestSimpleSearchEngine(unittest.TestCase):
         results = self.engine.query("test", max_results=3)
         self.assertEqual(len(results), 3)
     
+    def test_query_multiple_terms(self):
+        """Test multi-term queries only match documents containing every term."""
+        self.engine.feed_document("doc1", "Python Web", "Python is used for web development.")
+        self.engine.feed_document("doc2", "Python Data", "Python is used for data analysis.")
+        
+        results = self.engine.query("python web")
+        self.assertEqual([r['doc_id'] for r in results], ["doc1"])
+        self.assertEqual(results[0]['occurrences'], 4)
+    
+    def test_refeed_document_replaces_postings(self):
+        """Test re-indexing a document drops terms it no longer contains."""
+        self.engine.feed_document("doc1", "Old", "Python content")
+        self.engine.feed_document("doc1", "New", "Java content")
+        
+        self.assertEqual(self.engine.query("python"), [])
+        self.assertEqual(len(self.engine.query("java")), 1)
+        self.assertNotIn("python", self.engine.inverted)
+    
+    def test_query_snippet_after_refeed(self):
+        """Test snippets come from the current file, not a mapping of the replaced one."""
+        self.engine.feed_document("doc1", "Doc", "Python content")
+        self.assertIn("Python content", self.engine.query("content")[0]['snippet'])
+        
+        self.engine.feed_document("doc1", "Doc", "Updated CONTENT")
+        self.assertIn("Updated CONTENT", self.engine.query("content")[0]['snippet'])
+    
+    def test_inverted_index_persistence(self):
+        """Test the inverted index is reloaded, or rebuilt from the stored files if missing."""
+        self.engine.feed_document("doc1", "Python Programming", "Python is a programming language.")
+        self.engine.flush()
+        
+        reloaded = SimpleSearchEngine(backend=self.backend)
+        self.assertEqual(len(reloaded.query("python")), 1)
+        
+        self.backend.delete(INVERTED_FILE)
+        rebuilt = SimpleSearchEngine(backend=self.backend)
+        self.assertEqual(rebuilt.inverted, self.engine.inverted)
+    
+    def test_interrupted_flush(self):
+        """Test postings saved without their metadata are skipped until the document is fed again."""
+        self.engine.feed_document("doc1", "Test 1", "Content 1")
+        self.engine.flush()
+        self.engine.feed_document("doc2", "Test 2", "Content 2")
+        # The process dies after flush wrote the inverted index but before the metadata
+        self.engine._save_inverted_index()
+        
+        reloaded = SimpleSearchEngine(backend=self.backend)
+        self.assertEqual([r['doc_id'] for r in reloaded.query("content")], ["doc1"])
+        
+        reloaded.feed_document("doc2", "Test 2", "Content 2")
+        self.assertEqual(len(reloaded.query("content")), 2)
+    
+    def test_feed_documents(self):
+        """Test batch feeding writes every document and flushes the metadata once."""
+        docs = [
+            ("doc1", "Test 1", "Content 1", {"author": "A"}),
+            ("doc2", "Test 2", "Content 2"),
+        ]
+        
+        with patch.object(self.engine, '_save_metadata', wraps=self.engine._save_metadata) as save:
+            self.engine.feed_documents(docs)
+            save.assert_called_once()
+        
+        saved = json.loads(self.backend.read(METADATA_FILE))
+        self.assertEqual(saved['doc1']['metadata'], {"author": "A"})
+        self.assertEqual(saved['doc2']['metadata'], {})
+        self.assertEqual(len(self.engine.query("content")), 2)
+
+    def test_feed_documents_without_flush(self):
+        """Test batches fed with flush=False are only written by the next flush."""
+        self.engine.feed_documents([("doc1", "Test 1", "Content 1")], flush=False)
+        self.engine.feed_documents([("doc2", "Test 2", "Content 2")], flush=False)
+        self.assertEqual(json.loads(self.backend.read(METADATA_FILE)), {})
+
+        self.engine.flush()
+        self.assertEqual(set(json.loads(self.backend.read(METADATA_FILE))), {"doc1", "doc2"})
+
+    def test_concurrent_feed_documents(self):
+        """Test batches fed from several threads at once keep every posting."""
+        def feed(t):
+            for i in range(50):
+                self.engine.feed_documents([(f"doc{t}_{i}", f"Title {t}", "shared words shared")], flush=False)
+                # Re-indexing empties and drops the postings of the term it replaces
+                self.engine.feed_documents(
+                    [(f"doc{t}", "Toggled", "alpha" if i % 2 else "beta")], flush=False)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(feed, range(8)))
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(len(self.engine), 408)
+        self.assertEqual(len(self.engine.inverted["shared"]), 400)
+        self.assertEqual(set(self.engine.inverted["shared"].values()), {2})
+        self.assertEqual(sum(len(self.engine.inverted[str(t)]) for t in range(8)), 400)
+        self.assertEqual(len(self.engine.inverted["alpha"]), 8)
+        self.assertNotIn("beta", self.engine.inverted)
+
+    def test_query_during_concurrent_feeds(self):
+        """Test queries running while other threads feed documents see consistent posting lists."""
+        def feed(t):
+            for i in range(100):
+                self.engine.feed_documents([(f"doc{t}_{i}", "Shared", f"shared words {i}")], flush=False)
+
+        def search(_):
+            for _ in range(100):
+                for result in self.engine.query("shared words"):
+                    self.assertIn(result['doc_id'], self.engine.metadata)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [executor.submit(feed, t) for t in range(4)] + [executor.submit(search, t) for t in range(4)]
+                for future in futures:
+                    future.result()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(len(self.engine.query("shared words", max_results=1000)), 400)
+
+    def test_exit_flush(self):
+        """Test live engines are flushed at exit while dropped engines are collected."""
+        self.engine.feed_document("doc1", "Test 1", "Content 1")
+        _flush_open_engines()
+        self.assertIn("doc1", json.loads(self.backend.read(METADATA_FILE)))
+        
+        dropped = weakref.ref(SimpleSearchEngine(backend=DictBackend()))
+        gc.collect()
+        self.assertIsNone(dropped())
+    
     def test_get_stats(self):
         """Test statistics retrieval."""
         # Add some documents
@@ -144,7 +317,7 @@ class TestSimpleSearchEngine(unittest.TestCase):
         
         stats = self.engine.get_stats()
         self.assertEqual(stats['total_documents'], 2)
-        self.assertEqual(stats['index_directory'], str(self.temp_dir))
+        self.assertEqual(stats['index_directory'], DictBackend.location)
         self.assertIn('index_size_bytes', stats)
         self.assertGreater(stats['index_size_bytes'], 0)
 
@@ -152,15 +325,6 @@ class TestSimpleSearchEngine(unittest.TestCase):
 class TestWikipediaIndexer(unittest.TestCase):
     """Test cases for wikipedia indexer functions."""
     
-    def setUp(self):
-        """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.mock_engine = MagicMock()
-        
-    def tearDown(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir)
-    
     @patch('wikipedia_indexer.search_engine')
     def test_index_document(self, mock_search_engine):
         """Test index_document function."""
@@ -171,60 +335,144 @@ class TestWikipediaIndexer(unittest.TestCase):
         
         index_document(doc_id, title, content, metadata)
         
-        # Verify feed_document was called with correct parameters
-        mock_search_engine.feed_document.assert_called_once_with(
-            doc_id, title, content, metadata
+        # Verify the document was fed without writing the index
+        mock_search_engine.feed_documents.assert_called_once_with(
+            [(doc_id, title, content, metadata)], flush=False
         )
     
+    @patch('wikipedia_indexer.SimpleSearchEngine')
+    @patch('wikipedia_indexer.search_engine', None)
+    def test_get_search_engine_opens_index_once(self, mock_engine_class):
+        """Test the index is opened on first use and reused afterwards."""
+        engine = get_search_engine("./custom_index")
+        self.assertIs(get_search_engine(), engine)
+        mock_engine_class.assert_called_once_with(index_dir="./custom_index")
+    
     @patch('wikipedia_indexer.load_dataset')
     @patch('wikipedia_indexer.search_engine')
     def test_download_and_index_wikipedia(self, mock_search_engine, mock_load_dataset):
         """Test download_and_index_wikipedia function."""
         from wikipedia_indexer import download_and_index_wikipedia
         
-        # Mock dataset articles
-        mock_articles = [
-            {
-                'id': '1',
-                'title': 'Article 1',
-                'text': 'Content 1',
-                'url': 'http://wiki.com/1'
-            },
-            {
-                'id': '2',
-                'title': 'Article 2',
-                'text': 'Content 2',
-                'url': 'http://wiki.com/2'
-            },
-            {
-                'id': '3',
-                'title': '',  # Empty title, should be skipped
-                'text': 'Content 3',
-                'url': 'http://wiki.com/3'
-            }
-        ]
+        # Mock dataset articles, streamed like the real dataset instead of held in a list
+        def mock_articles():
+            for i in range(1, 4):
+                yield {
+                    'id': str(i),
+                    'title': f'Article {i}' if i < 3 else '',  # Empty title, should be skipped
+                    'text': f'Content {i}',
+                    'url': f'http://wiki.com/{i}'
+                }
         
-        mock_load_dataset.return_value = iter(mock_articles)
+        mock_load_dataset.return_value = mock_articles()
+        mock_search_engine.document_metadata.return_value = None
         
         # Test indexing 2 documents
         download_and_index_wikipedia(n_documents=2)
         
-        # Should have called feed_document twice (skipping the empty title)
-        self.assertEqual(mock_search_engine.feed_document.call_count, 2)
+        # Should have fed two documents (skipping the empty title)
+        fed = [doc for call in mock_search_engine.feed_documents.call_args_list for doc in call[0][0]]
+        self.assertEqual(len(fed), 2)
+        
+        # Check the documents carry the correct data: (doc_id, title, content)
+        for i, doc in enumerate(fed, 1):
+            self.assertEqual(doc[:3], (str(i), f'Article {i}', f'Content {i}'))
+        mock_search_engine.flush.assert_called()
+
+
+    @patch('wikipedia_indexer.load_dataset')
+    def test_download_and_index_wikipedia_is_incremental(self, mock_load_dataset):
+        """Test reruns skip indexed documents and resume after the articles already read."""
+        from wikipedia_indexer import download_and_index_wikipedia
+        
+        articles = [
+            {'id': str(i), 'title': f'Article {i}', 'text': f'Content {i}', 'url': ''}
+            for i in range(1, 5)
+        ]
+        dataset = MagicMock()
+        dataset.__iter__.side_effect = lambda: iter(articles)
+        dataset.skip.side_effect = lambda n: articles[n:]
+        mock_load_dataset.return_value = dataset
+        
+        engine = SimpleSearchEngine(backend=DictBackend())
+        with patch('wikipedia_indexer.search_engine', engine):
+            download_and_index_wikipedia(n_documents=2)
+            self.assertEqual(len(engine), 2)
+            dataset.skip.assert_not_called()
+            
+            # A larger run only reads the articles past the first two
+            with patch.object(engine, 'feed_document', wraps=engine.feed_document) as feed:
+                download_and_index_wikipedia(n_documents=4)
+            dataset.skip.assert_called_once_with(2)
+            self.assertEqual([c[0][0] for c in feed.call_args_list], ['3', '4'])
+            
+            # Nothing new to read
+            download_and_index_wikipedia(n_documents=3)
+            self.assertEqual(mock_load_dataset.call_count, 2)
+            
+            # Forced runs start over and index everything again
+            with patch.object(engine, 'feed_document', wraps=engine.feed_document) as feed:
+                download_and_index_wikipedia(n_documents=4, force=True)
+            self.assertEqual(feed.call_count, 4)
+    
+    @patch('wikipedia_indexer.load_dataset')
+    def test_download_and_index_wikipedia_skips_indexed_documents(self, mock_load_dataset):
+        """Test documents already in the index are not fed again."""
+        from wikipedia_indexer import download_and_index_wikipedia
         
-        # Check the calls were made with correct data
-        calls = mock_search_engine.feed_document.call_args_list
+        mock_load_dataset.return_value = iter([
+            {'id': str(i), 'title': f'Article {i}', 'text': f'Content {i}', 'url': ''}
+            for i in range(1, 4)
+        ])
         
-        # First call
-        self.assertEqual(calls[0][0][0], '1')  # doc_id
-        self.assertEqual(calls[0][0][1], 'Article 1')  # title
-        self.assertEqual(calls[0][0][2], 'Content 1')  # content
+        engine = SimpleSearchEngine(backend=DictBackend())
+        engine.feed_document('2', 'Article 2', 'Content 2')
+        with patch('wikipedia_indexer.search_engine', engine), \
+             patch.object(engine, 'feed_document', wraps=engine.feed_document) as feed:
+            download_and_index_wikipedia(n_documents=3)
+        
+        self.assertEqual([c[0][0] for c in feed.call_args_list], ['1', '3'])
+    
+    @patch('wikipedia_indexer.GraphExtractor')
+    @patch('wikipedia_indexer.GraphDatabase')
+    @patch('wikipedia_indexer.load_dataset')
+    def test_download_and_index_wikipedia_retries_missing_graph_data(self, mock_load_dataset,
+                                                                     mock_graph_db, mock_extractor):
+        """Test documents without stored graph data are extracted again by later graph runs."""
+        from wikipedia_indexer import download_and_index_wikipedia
+        
+        articles = [
+            {'id': str(i), 'title': f'Article {i}', 'text': f'Content {i}', 'url': ''}
+            for i in range(1, 3)
+        ]
+        mock_load_dataset.side_effect = lambda *args, **kwargs: iter(articles)
+        graph_db = mock_graph_db.return_value
+        graph_db.test_connection.return_value = True
+        graph_db.store_extraction_results.side_effect = lambda docs: [
+            {'entities_stored': 0, 'relations_stored': 0} for _ in docs
+        ]
+        extract_batch = mock_extractor.return_value.extract_batch
         
-        # Second call
-        self.assertEqual(calls[1][0][0], '2')  # doc_id
-        self.assertEqual(calls[1][0][1], 'Article 2')  # title
-        self.assertEqual(calls[1][0][2], 'Content 2')  # content
+        engine = SimpleSearchEngine(backend=DictBackend())
+        with patch('wikipedia_indexer.search_engine', engine):
+            # Indexed without graph data first
+            download_and_index_wikipedia(n_documents=2)
+            
+            # A failed extraction is not counted as done
+            extract_batch.side_effect = RuntimeError("out of memory")
+            download_and_index_wikipedia(n_documents=2, enable_graph=True)
+            self.assertEqual(mock_load_dataset.call_count, 2)
+            
+            extract_batch.side_effect = lambda docs: [MagicMock() for _ in docs]
+            download_and_index_wikipedia(n_documents=2, enable_graph=True)
+            self.assertEqual(mock_load_dataset.call_count, 3)
+            self.assertEqual(extract_batch.call_count, 2)
+            self.assertTrue(engine.document_metadata('1')['graph_extracted'])
+            
+            # Everything has its graph data now
+            download_and_index_wikipedia(n_documents=2, enable_graph=True)
+            self.assertEqual(mock_load_dataset.call_count, 3)
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -5,26 +5,61 @@ Uses the Hugging Face datasets library to access Wikipedia data.
 """
 
 import argparse
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datasets import load_dataset
+import pyarrow
+import pyarrow.dataset
 import logging
 import logging_config  # Centralized logging configuration
 from simple_search_engine import SimpleSearchEngine
-from graph_extractor import extract_graph_from_document
+from graph_extractor import DEFAULT_DEVICE, MODEL_DTYPES, GraphExtractor, ProcessPoolExtractor
 from graph_database import GraphDatabase
 from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import queue
 import threading
 
 logger = logging.getLogger(__name__)
 
-# Initialize the search engine
-search_engine = SimpleSearchEngine(index_dir="./wikipedia_index")
+DEFAULT_INDEX_DIR = "./wikipedia_index"
 
-# Initialize the graph database (will be used if graph extraction is enabled)
-graph_db = None
+# Opened on first use, so importing this module doesn't load the index
+search_engine: Optional[SimpleSearchEngine] = None
 
+# Documents per graph extraction batch; GPUs need larger batches to stay busy
+GPU_GRAPH_BATCH_SIZE = 16
+CPU_GRAPH_BATCH_SIZE = 4
 
-def index_document(doc_id: str, title: str, content: str, metadata: Dict[str, Any], enable_graph: bool = False, model_name: str = "urchade/gliner_mediumv2.1", device: str = "cpu") -> None:
+# The dataset is streamed from Parquet files: pre-buffer whole column chunks in few large reads and
+# let PyArrow's IO threads fetch the next range while the current row group is being indexed
+PARQUET_SCAN_OPTIONS = pyarrow.dataset.ParquetFragmentScanOptions(
+    pre_buffer=True,
+    cache_options=pyarrow.CacheOptions(prefetch_limit=1, range_size_limit=128 << 20),
+)
+
+# Number of dataset articles read by the last complete run, and whether it extracted graph data.
+# Kept inside the search index, so removing the index also resets where the next run starts
+RESUME_STATE_FILE = "resume.json"
+
+# Search index metadata flag of documents whose graph data is stored
+GRAPH_METADATA_KEY = "graph_extracted"
+
+# (doc_id, title, content, metadata) of a document ready to be indexed
+Document = Tuple[str, str, str, Dict[str, Any]]
+
+Extractor = Union[GraphExtractor, ProcessPoolExtractor]
+
+
+def get_search_engine(index_dir: str = DEFAULT_INDEX_DIR) -> SimpleSearchEngine:
+    """Return the search engine, opening the index in index_dir on first use."""
+    global search_engine
+    if search_engine is None:
+        search_engine = SimpleSearchEngine(index_dir=index_dir)
+    return search_engine
+
+
+def index_document(doc_id: str, title: str, content: str, metadata: Dict[str, Any], extractor: Optional[Extractor] = None, graph_db: Optional[GraphDatabase] = None) -> bool:
     """
     Index a document into the search engine and optionally extract graph data.
 
@@ -33,91 +68,173 @@ def index_document(doc_id: str, title: str, content: str, metadata: Dict[str, An
         title: Document title
         content: Document content/body text
         metadata: Additional metadata (url, categories, etc.)
-        enable_graph: Whether to extract and store graph data
-        model_name: Model to use for graph extraction
-        device: Device to run models on (cpu or cuda)
+        extractor: Graph extractor; graph data is extracted when both it and graph_db are given
+        graph_db: Graph database to store extracted graph data in
+
+    Returns:
+        False if graph data was requested but could not be extracted or stored
     """
-    # Index in the search engine
-    search_engine.feed_document(doc_id, title, content, metadata)
+    return index_documents([(doc_id, title, content, metadata)], extractor, graph_db)
+
+
+def index_documents(documents: List[Document], extractor: Optional[Extractor] = None, graph_db: Optional[GraphDatabase] = None) -> bool:
+    """
+    Index a batch of documents into the search engine and optionally extract graph data.
+
+    Graph extraction runs once for the whole batch, so the models see the
+    chunks of every document together instead of one document at a time.
+    Documents whose graph data was stored are marked with GRAPH_METADATA_KEY
+    in their search index metadata.
 
-    # Extract and store graph data if enabled
-    if enable_graph and graph_db:
-        try:
-            logger.info(f"Extracting graph data for document: {title}")
-            extraction_result = extract_graph_from_document(doc_id, title, content, model_name=model_name, device=device)
+    Args:
+        documents: List of (doc_id, title, content, metadata) tuples
+        extractor: Graph extractor; graph data is extracted when both it and graph_db are given
+        graph_db: Graph database to store extracted graph data in
+
+    Returns:
+        False if graph data was requested but could not be extracted or stored
+    """
+    graph_requested = bool(extractor and graph_db and documents)
+    graph_stored = graph_requested and store_graphs(documents, extractor, graph_db)
+    if graph_stored:
+        documents = [
+            (doc_id, title, content, {**metadata, GRAPH_METADATA_KEY: True})
+            for doc_id, title, content, metadata in documents
+        ]
+
+    # Index in the search engine even if graph extraction failed; the index is written
+    # once the whole run is done
+    get_search_engine().feed_documents(documents, flush=False)
+    return graph_stored or not graph_requested
+
+
+def store_graphs(documents: List[Document], extractor: Extractor, graph_db: GraphDatabase) -> bool:
+    """Extract graph data for a batch of documents and store it, returning False if either step failed."""
+    try:
+        logger.info("Extracting graph data for %d document(s)", len(documents))
+        extraction_results = extractor.extract_batch(
+            [(doc_id, title, content) for doc_id, title, content, _ in documents]
+        )
+    except Exception as e:
+        logger.error("Failed to extract graph data for %d document(s): %s", len(documents), e)
+        return False
 
-            # Store in graph database
-            storage_result = graph_db.store_extraction_result(doc_id, title, extraction_result, metadata)
+    try:
+        # Store the whole batch in the graph database in one transaction
+        storage_results = graph_db.store_extraction_results([
+            (doc_id, title, extraction_result, metadata)
+            for (doc_id, title, _, metadata), extraction_result in zip(documents, extraction_results)
+        ])
+    except Exception as e:
+        logger.error("Failed to store graph data for %d document(s): %s", len(documents), e)
+        return False
 
-            logger.info(f"Graph extraction complete for '{title}': "
-                       f"{storage_result['entities_stored']} entities, "
-                       f"{storage_result['relations_stored']} relations stored")
-        except Exception as e:
-            logger.error(f"Failed to extract graph data for '{title}': {e}")
-            # Continue with regular indexing even if graph extraction fails
+    if logger.isEnabledFor(logging.INFO):
+        for (_, title, _, _), storage_result in zip(documents, storage_results):
+            logger.info("Graph extraction complete for '%s': %d entities, %d relations stored",
+                        title, storage_result['entities_stored'], storage_result['relations_stored'])
+    return True
 
 
-def process_single_document(article_data: tuple, enable_graph: bool, model_name: str, device: str, language: str) -> bool:
+def prepare_article(i: int, article: Dict[str, Any], language: str) -> Optional[Document]:
     """
-    Process a single document. Thread-safe function for parallel processing.
+    Turn a dataset article into a document ready for indexing.
 
     Args:
-        article_data: Tuple of (index, article) data
-        enable_graph: Whether to extract and store graph data
-        model_name: Model to use for graph extraction
-        device: Device to run models on
+        i: Position of the article in the dataset
+        article: Article record from the dataset
         language: Language code
 
     Returns:
-        True if processing succeeded, False otherwise
+        The (doc_id, title, content, metadata) tuple, or None for an empty article
     """
-    i, article = article_data
+    # Extract article data
+    doc_id = article.get('id', str(i))
+    title = article.get('title', '')
+    content = article.get('text', '')
+    url = article.get('url', '')
 
-    try:
-        # Extract article data
-        doc_id = article.get('id', str(i))
-        title = article.get('title', '')
-        content = article.get('text', '')
-        url = article.get('url', '')
-
-        # Prepare metadata
-        metadata = {
-            'url': url,
-            'language': language,
-            'source': 'wikipedia',
-        }
-
-        # Skip empty articles
-        if not title or not content:
-            logger.warning(f"Skipping empty article at index {i}")
-            return False
-
-        logger.info(f"Processing: {title}")
-
-        # Index the document (with optional graph extraction)
-        index_document(doc_id, title, content, metadata, enable_graph, model_name, device)
-        return True
+    # Skip empty articles
+    if not title or not content:
+        logger.warning("Skipping empty article at index %d", i)
+        return None
 
-    except Exception as e:
-        logger.error(f"Error processing document at index {i}: {e}")
-        return False
+    # Prepare metadata
+    metadata = {
+        'url': url,
+        'language': language,
+        'source': 'wikipedia',
+    }
+
+    return doc_id, title, content, metadata
 
 
-def download_and_index_wikipedia(n_documents: int = 1000, language: str = "en", enable_graph: bool = False, model_name: str = "urchade/gliner_mediumv2.1", device: str = "cpu", parallel_workers: int = 1) -> None:
+def is_indexed(doc_id: str, graph: bool = False) -> bool:
+    """Return True if a document is in the search index and, when graph is set, has its graph data stored."""
+    metadata = get_search_engine().document_metadata(doc_id)
+    return metadata is not None and (not graph or metadata.get(GRAPH_METADATA_KEY, False))
+
+
+def load_resume_position(graph: bool = False) -> int:
+    """
+    Return how many dataset articles earlier runs already indexed, or 0 to start from the beginning.
+
+    With graph set, only a position saved by a run that also extracted graph data counts.
+    """
+    # An empty index has nothing to resume, even if an old cursor survived
+    engine = get_search_engine()
+    if not len(engine) or not engine.backend.exists(RESUME_STATE_FILE):
+        return 0
+    state = json.loads(engine.backend.read(RESUME_STATE_FILE))
+    if graph and not state.get('graph', False):
+        return 0
+    return state['articles_read']
+
+
+def save_resume_position(articles_read: int, graph: bool = False) -> None:
+    """Record that the first articles_read dataset articles are indexed, with graph data if graph is set."""
+    state = {'articles_read': articles_read, 'graph': graph}
+    get_search_engine().backend.write(RESUME_STATE_FILE, json.dumps(state).encode('utf-8'))
+
+
+def download_and_index_wikipedia(n_documents: int = 1000, language: str = "en", enable_graph: bool = False, model_name: str = "urchade/gliner_mediumv2.1", device: str = DEFAULT_DEVICE, parallel_workers: int = 1, graph_batch_size: Optional[int] = None, onnx_model_file: Optional[str] = None, dtype: str = "auto", force: bool = False) -> None:
     """
     Download and process N most popular Wikipedia pages.
 
+    Runs are incremental: articles read by earlier complete runs are skipped
+    without being fetched again, and documents already in the search index are
+    neither re-indexed nor re-extracted, unless force is set. With graph extraction
+    enabled, documents indexed without their graph data are indexed again.
+
     Args:
         n_documents: Number of documents to process
         language: Wikipedia language code (default: "en" for English)
         enable_graph: Whether to extract and store graph data
         model_name: Model to use for graph extraction
-        device: Device to run models on (cpu or cuda)
+        device: Device to run models on (cpu, cuda or mps)
         parallel_workers: Number of parallel workers (default: 1)
+        graph_batch_size: Number of documents per graph extraction call
+            (default: 16 on a GPU, 4 on cpu)
+        onnx_model_file: ONNX file to run a multitask model from through onnxruntime
+        dtype: Model dtype for graph extraction (fp32, bf16, fp16 or auto)
+        force: Re-index every article from the start of the dataset
     """
-    global graph_db
+    engine = get_search_engine()
+
+    # Resume after the articles earlier runs already indexed
+    start = 0 if force else load_resume_position(enable_graph)
+    if start >= n_documents:
+        logger.info(f"The first {n_documents} Wikipedia pages are already indexed; use --force to re-index them")
+        return
+    if start:
+        logger.info(f"Resuming after the {start} Wikipedia pages indexed by earlier runs")
+
+    if graph_batch_size is None:
+        graph_batch_size = CPU_GRAPH_BATCH_SIZE if device == "cpu" else GPU_GRAPH_BATCH_SIZE
 
     # Initialize graph database if graph extraction is enabled
+    graph_db = None
+    extractor = None
     if enable_graph:
         graph_db = GraphDatabase(database="wiki_search")
         if not graph_db.test_connection():
@@ -127,52 +244,128 @@ def download_and_index_wikipedia(n_documents: int = 1000, language: str = "en",
         else:
             logger.info("Graph database connection established. Graph extraction enabled.")
 
+    # Load the extraction model once, up front, instead of on the first document
+    if enable_graph:
+        logger.info(f"Loading graph extraction model: {model_name}")
+        extractor_config = dict(model_name=model_name, device=device, onnx_model_file=onnx_model_file, dtype=dtype)
+        if device == "cpu" and parallel_workers > 1:
+            # CPU inference holds the GIL, so each worker extracts in its own process with its own model
+            extractor = ProcessPoolExtractor(parallel_workers, **extractor_config)
+        else:
+            extractor = GraphExtractor(**extractor_config)
+
     logger.info(f"Loading Wikipedia dataset for language: {language}")
     logger.info(f"Using {parallel_workers} worker(s) for processing")
+    if enable_graph and parallel_workers > 1 and device != "cpu":
+        logger.warning("Several workers share one GPU; graph extraction may run out of GPU memory")
 
     try:
         # Load dataset with streaming to avoid downloading everything
-        dataset = load_dataset("wikimedia/wikipedia", "20231101.en", split="train", streaming=True)
+        dataset = load_dataset("wikimedia/wikipedia", "20231101.en", split="train", streaming=True,
+                               fragment_scan_options=PARQUET_SCAN_OPTIONS)
 
-        logger.info(f"Starting to process {n_documents} Wikipedia pages...")
+        if start:
+            dataset = dataset.skip(start)
 
-        # Collect articles for processing
-        articles_to_process = []
-        for i, article in enumerate(dataset):
-            if len(articles_to_process) >= n_documents:
-                break
-            articles_to_process.append((i, article))
+        logger.info(f"Starting to process {n_documents - start} Wikipedia pages...")
 
+        # A producer thread streams articles, turns them into documents and drops the ones
+        # that are empty or already indexed, feeding a bounded queue while the workers index,
+        # so fetching and preparing the next articles overlaps with indexing and graph extraction.
+        # Each worker can have one batch waiting in the queue while it works on the current one.
+        documents = queue.Queue(maxsize=parallel_workers * graph_batch_size)
+        producer_errors = []
+        articles_read = start
         processed = 0
-
-        if parallel_workers == 1:
-            # Sequential processing
-            for article_data in articles_to_process:
-                if process_single_document(article_data, enable_graph, model_name, device, language):
-                    processed += 1
+        skipped = 0
+        failed_batches = 0
+        processed_lock = threading.Lock()
+
+        def produce():
+            nonlocal articles_read, skipped
+            try:
+                # islice stops without pulling an extra article past the last one
+                for i, article in enumerate(islice(dataset, n_documents - start), start=start):
+                    articles_read = i + 1
+                    document = prepare_article(i, article, language)
+                    if document is None:
+                        continue
+                    if not force and is_indexed(document[0], enable_graph):
+                        skipped += 1
+                        continue
+                    documents.put(document)
+            except Exception as e:
+                producer_errors.append(e)
+            finally:
+                # One end marker per worker
+                for _ in range(parallel_workers):
+                    documents.put(None)
+
+        def index_batch(batch):
+            nonlocal processed, failed_batches
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing: %s", ", ".join(title for _, title, _, _ in batch))
+            try:
+                complete = index_documents(batch, extractor, graph_db)
+            except Exception as e:
+                logger.error("Error indexing batch of %d document(s): %s", len(batch), e)
+                with processed_lock:
+                    failed_batches += 1
+                return
+            with processed_lock:
+                processed += len(batch)
+                # Search indexed, but without graph data; the next run extracts it again
+                if not complete:
+                    failed_batches += 1
+
+        def consume():
+            # Each worker groups the documents it takes into graph extraction batches
+            pending = []
+            while (document := documents.get()) is not None:
+                pending.append(document)
+                if len(pending) >= graph_batch_size:
+                    index_batch(pending)
+                    pending = []
+
+            # Flush the last partial batch
+            if pending:
+                index_batch(pending)
+
+        producer = threading.Thread(target=produce, name="wikipedia-prefetch", daemon=True)
+        producer.start()
+
+        with ThreadPoolExecutor(max_workers=parallel_workers) as executor:
+            workers = [executor.submit(consume) for _ in range(parallel_workers)]
+            for worker in workers:
+                worker.result()
+
+        producer.join()
+        if producer_errors:
+            raise producer_errors[0]
+
+        # Documents are only fed into memory; write the search index once at the end
+        engine.flush()
+
+        # The next run can skip past these articles, unless some of them failed to index
+        if failed_batches:
+            logger.warning(f"{failed_batches} batch(es) failed to index; the next run will read them again")
         else:
-            # Parallel processing
-            with ThreadPoolExecutor(max_workers=parallel_workers) as executor:
-                # Submit all tasks
-                futures = [
-                    executor.submit(process_single_document, article_data, enable_graph, model_name, device, language)
-                    for article_data in articles_to_process
-                ]
-
-                # Collect results
-                for future in futures:
-                    try:
-                        if future.result():
-                            processed += 1
-                    except Exception as e:
-                        logger.error(f"Error in parallel processing: {e}")
+            save_resume_position(articles_read, enable_graph)
 
         logger.info(f"Successfully processed {processed} documents")
+        if skipped:
+            logger.info(f"Skipped {skipped} documents that were already indexed")
 
     except Exception as e:
         logger.error(f"Error loading dataset: {e}")
         raise
 
+    finally:
+        # Keep whatever was fed before a failure; a no-op if nothing changed since the last flush
+        engine.flush()
+        if isinstance(extractor, ProcessPoolExtractor):
+            extractor.close()
+
 
 def main():
     parser = argparse.ArgumentParser(description="Download and index Wikipedia pages")
@@ -188,6 +381,11 @@ def main():
         default="en",
         help="Wikipedia language code (default: en)"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-index all pages from the start instead of skipping pages indexed by earlier runs"
+    )
     parser.add_argument(
         "--enable-graph",
         action="store_true",
@@ -205,9 +403,37 @@ def main():
     parser.add_argument(
         "--device",
         type=str,
-        default="cpu",
-        choices=["cpu", "cuda"],
-        help="Device to run models on (default: cpu). Use 'cuda' for GPU acceleration."
+        default=DEFAULT_DEVICE,
+        choices=["cpu", "cuda", "mps"],
+        help="Device to run models on (default: cuda if available, otherwise cpu; "
+             "use mps for Apple Silicon GPUs)"
+    )
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        default="auto",
+        choices=["auto", *MODEL_DTYPES],
+        help="Precision of the graph extraction models (default: auto, which is bf16 "
+             "on GPUs that support it, otherwise fp16, and fp32 on cpu). "
+             "bf16 falls back to fp32 on GPUs without native bf16, including mps."
+    )
+    parser.add_argument(
+        "--onnx",
+        nargs="?",
+        const="model.onnx",
+        default=None,
+        metavar="FILE",
+        help="Run a multitask model through onnxruntime from this ONNX file in the model repo "
+             "(default file: model.onnx). Uses the CUDA execution provider with --device cuda "
+             "when onnxruntime-gpu is installed in place of onnxruntime."
+    )
+    parser.add_argument(
+        "--graph-batch-size",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Number of documents per graph extraction batch "
+             "(default: 16 with --device cuda or mps, otherwise 4)."
     )
     parser.add_argument(
         "--parallel",
@@ -215,10 +441,18 @@ def main():
         default=1,
         metavar="N",
         help="Number of parallel workers for processing documents (default: 1). "
-             "WARNING: Using >1 with --device cuda may cause GPU memory conflicts."
+             "With --device cpu and --enable-graph each worker extracts in its own process. "
+             "WARNING: Using >1 with --device cuda or mps may cause GPU memory conflicts."
+    )
+
+    parser.add_argument(
+        "--index-dir",
+        default=DEFAULT_INDEX_DIR,
+        help=f"Search index directory (default: {DEFAULT_INDEX_DIR})"
     )
 
     args = parser.parse_args()
+    get_search_engine(args.index_dir)
 
     download_and_index_wikipedia(
         n_documents=args.num_documents,
@@ -226,7 +460,11 @@ def main():
         enable_graph=args.enable_graph,
         model_name=args.model,
         device=args.device,
-        parallel_workers=args.parallel
+        parallel_workers=args.parallel,
+        graph_batch_size=args.graph_batch_size,
+        onnx_model_file=args.onnx,
+        dtype=args.dtype,
+        force=args.force
     )
 
 